@@ -2,12 +2,24 @@
 # app.py — Monosíl·labs
 # =========================
 import streamlit as st
-import pandas as pd
+import hashlib
+import os
 import random
-import json, base64, requests, time
-import unicodedata, re
+import uuid
 from datetime import datetime
 
+import metrics
+import quiz_engine
+from checker import Checker, highlight, prepare
+from corpus import Corpus, build_parelles, load_pares
+from leaderboard import SIZES, Leaderboard
+from mastery import SESSION_PREFIX, MasteryStore
+from outbox import WRITTEN, Outbox
+from search import SearchIndex, normalize
+from shared_cache import SharedCacheBackend
+from scores_store import (ScoreBackend, ScoreCache, LocalShardedStore, GitHubShardedStore,
+                          SQLiteStore, WriteQueue)
+
 # -------------------------
 # Config de página (una vez)
 # -------------------------
@@ -23,6 +35,39 @@ st.set_page_config(
     }
 )
 
+# -------------------------
+# Mètriques (opcionals)
+# -------------------------
+def _secret(key: str, default=None):
+    """`st.secrets.get` que no peta quan no hi ha `secrets.toml`."""
+    try:
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+@st.cache_resource
+def setup_metrics() -> bool:
+    """Activa `metrics` si ho demanen els secrets o `MONOSILABS_METRICS=1`; una vegada per procés."""
+    if not (_secret("METRICS", False) or os.environ.get("MONOSILABS_METRICS") == "1"):
+        return False
+    metrics.enable(path=_secret("METRICS_PATH"))
+    port = _secret("METRICS_PORT")
+    if port:
+        try:
+            metrics.serve(int(port))
+        except OSError:
+            pass  # una altra rèplica ja té el port
+    return True
+
+setup_metrics()
+# Spans oberts del rerun en curs. Es tanquen al final del guió o, si un
+# `safe_rerun()` l'interromp abans, just abans de llançar el rerun.
+_spans = [metrics.start("rerun")]
+
+def close_spans():
+    while _spans:
+        _spans.pop().stop()
+
 # -------------------------
 # Estado inicial seguro
 # -------------------------
@@ -40,485 +85,156 @@ if "quiz_corrected" not in st.session_state:
     st.session_state.quiz_corrected = False
 if "last_score" not in st.session_state:
     st.session_state.last_score = {}
-if "scores" not in st.session_state:
-    st.session_state.scores = []
 
 
 # -------------------------
 # CSS (usa session_state.dark_mode)
 # -------------------------
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+THEME_CSS = {False: "theme-light.css", True: "theme-dark.css"}
+
+@st.cache_resource
+def theme_hrefs():
+    """URL dels fulls d'estil servits per l'app, amb el hash del contingut
+    perquè el navegador els guarde en caché i els renove quan canvien."""
+    hrefs = {}
+    for dark, name in THEME_CSS.items():
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            version = hashlib.sha1(f.read()).hexdigest()[:10]
+        hrefs[dark] = f"app/static/{name}?v={version}"
+    return hrefs
+
 def inject_custom_css():
-    """CSS personalitzat amb suport per a mode fosc i clar, sense trencar DataFrame/canvas."""
-    dark = st.session_state.get("dark_mode", False)
+    """CSS personalitzat amb suport per a mode fosc i clar, sense trencar DataFrame/canvas.
 
-    if dark:
-        # ===== MODE FOSC =====
-        st.markdown("""
-        <style>
-        :root {
-            --bg: #1e1e1e; --bg-2: #2a2a2a; --bg-3: #2d2d2d;
-            --fg: #f5f7fa; --border: #404040; --accent: #4a9eff;
-            --btn: #2d2d2d; --btn-hover: #404040;
-            --code-bg: #1a1a1a; --code-fg: #e0e0e0;
-        }
-
-        html, body, .stApp, [data-testid="stAppViewContainer"], .block-container {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-        }
-        .stMarkdown, .stText, .stCaption, .stMetric, .stAlert, .stCodeBlock,
-        h1, h2, h3, h4, h5, h6, p, span, label { color: var(--fg) !important; }
-
-        /* Sidebar */
-        [data-testid="stSidebar"] {
-            background-color: var(--bg-2) !important;
-            color: var(--fg) !important;
-        }
-        [data-testid="stSidebar"] h1, 
-        [data-testid="stSidebar"] h2,
-        [data-testid="stSidebar"] h3,
-        [data-testid="stSidebar"] p,
-        [data-testid="stSidebar"] span,
-        [data-testid="stSidebar"] label { color: var(--fg) !important; }
-
-        /* Inputs */
-        .stTextInput input,
-        .stTextArea textarea {
-            background-color: var(--bg-3) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-
-        /* Botons base i primaris */
-        .stButton > button {
-            background-color: var(--btn) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-        .stButton > button:hover { background-color: var(--btn-hover) !important; }
-        button[data-testid="baseButton-primary"] {
-            background-color: var(--accent) !important;
-            border-color: var(--accent) !important;
-            color: #ffffff !important;
-        }
-
-        /* Blocs quiz */
-        .quiz-question {
-            border-left: 4px solid var(--accent);
-            padding: 1rem; margin: 1rem 0;
-            background-color: var(--bg-2);
-            border-radius: 6px; border: 1px solid var(--border);
-        }
-
-        /* DataFrame (fosc): contenidor i canvas */
-        [data-testid="stDataFrame"] {
-            background-color: var(--bg-2) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-            border-radius: 6px;
-        }
-        [data-testid="stDataFrame"] table th,
-        [data-testid="stDataFrame"] table td {
-            background-color: var(--bg-2) !important;
-            color: var(--fg) !important;
-            border-color: var(--border) !important;
-        }
-        [data-testid="stDataFrame"] canvas {
-            background-color: var(--bg-2) !important;
-            image-rendering: auto !important;
-        }
-
-        /* Codi */
-        .stCode, .stCodeBlock, [data-testid="stCodeBlock"], pre, code {
-            background-color: var(--code-bg) !important;
-            color: var(--code-fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-
-        /* Tooltips (fosc) — fons clar + text fosc */
-        [data-testid="stTooltipContent"],
-        div[role="tooltip"] {
-            background: #f5f7fa !important;
-            color: #111827 !important;
-            border: 1px solid #e5e7eb !important;
-            box-shadow: 0 6px 18px rgba(0,0,0,0.35) !important;
-            z-index: 9999 !important;
-        }
-        div[role="tooltip"] * { color: inherit !important; }
-
-        /* Accent per a subratllats puntuals */
-        .accented { color: #1e90ff !important; font-weight: 600; }
-        </style>
-        """, unsafe_allow_html=True)
+    El CSS viu a `static/` (`enableStaticServing`): a cada rerun només
+    s'envia un `<link>` d'uns 80 bytes i el navegador baixa el full una vegada.
+    """
+    href = theme_hrefs()[st.session_state.get("dark_mode", False)]
+    st.markdown(f'<link rel="stylesheet" href="{href}">', unsafe_allow_html=True)
 
-    else:
-        # ===== MODE CLAR =====
-        st.markdown("""
-        <style>
-        :root {
-            --bg: #ffffff; --bg-2: #f8f9fa; --bg-3: #ffffff;
-            --fg: #111827; --muted: #374151; --border: #d1d5db;
-            --accent: #0066cc; --btn: #ffffff; --btn-hover: #e9ecef;
-            --code-bg: #f8f9fa; --code-fg: #333333;
-        }
-
-        html, body, .stApp, [data-testid="stAppViewContainer"], .block-container {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-        }
-        .stMarkdown, .stText, .stCaption, .stMetric, .stAlert, .stCodeBlock,
-        h1, h2, h3, h4, h5, h6, p, span, label { color: var(--fg) !important; }
-
-        /* Sidebar (clar) */
-        [data-testid="stSidebar"] { background-color: var(--bg-2) !important; }
-        [data-testid="stSidebar"] h1, 
-        [data-testid="stSidebar"] h2,
-        [data-testid="stSidebar"] h3,
-        [data-testid="stSidebar"] p,
-        [data-testid="stSidebar"] span,
-        [data-testid="stSidebar"] label { color: var(--fg) !important; }
-
-        /* Inputs text & focus */
-        .stTextInput input {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-        .stTextInput input:focus {
-            border-color: var(--accent) !important;
-            box-shadow: 0 0 0 1px var(--accent) inset !important;
-        }
-        .stTextInput input::placeholder { color: #6b7280 !important; }
-        .stTextArea textarea {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-
-        /* Selectbox control cerrado */
-        .stSelectbox [data-baseweb="select"],
-        .stSelectbox [data-baseweb="select"] > div {
-            background-color: #ffffff !important;
-            color: #111827 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        .stSelectbox [data-baseweb="select"] input,
-        .stSelectbox [data-baseweb="select"] [data-baseweb="single-value"],
-        .stSelectbox [data-baseweb="select"] [data-baseweb="placeholder"] {
-            color: #111827 !important;
-        }
-        .stSelectbox svg, .stSelectbox svg * {
-            fill: #111827 !important;
-            stroke: #111827 !important;
-        }
-
-        /* Botones */
-        .stButton > button {
-            background-color: var(--btn) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-        .stButton > button:hover {
-            background-color: var(--btn-hover) !important;
-        }
-        button[data-testid="baseButton-primary"] {
-            background-color: var(--accent) !important;
-            border-color: var(--accent) !important;
-            color: #ffffff !important;
-        }
-
-        /* Bloques quiz */
-        .quiz-question {
-            border-left: 4px solid var(--accent);
-            padding: 1rem; margin: 1rem 0;
-            background-color: var(--bg);
-            border-radius: 6px; border: 1px solid var(--border);
-        }
-
-        /* DataFrame claro */
-        [data-testid="stDataFrame"],
-        [data-testid="stDataFrame"] table,
-        [data-testid="stDataFrame"] th,
-        [data-testid="stDataFrame"] td,
-        [data-testid="stDataFrame"] canvas {
-            background-color: #ffffff !important;
-            color: #111827 !important;
-            border-color: #e5e7eb !important;
-        }
-
-        /* Tabs claro */
-        [data-testid="stTabs"] [role="tablist"] {
-            background-color: #ffffff !important;
-            border-bottom: 1px solid #e5e7eb !important;
-        }
-        [data-testid="stTabs"] [role="tab"] {
-            background-color: #f8f9fa !important;
-            color: #111827 !important;
-            border: 1px solid #e5e7eb !important;
-        }
-        [data-testid="stTabs"] [role="tab"][aria-selected="true"] {
-            background-color: #ffffff !important;
-            color: #111827 !important;
-        }
-
-        /* Código */
-        .stCode, .stCodeBlock, [data-testid="stCodeBlock"], pre, code {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-
-        /* Tooltips (clar) */
-        [data-testid="stTooltipContent"],
-        div[role="tooltip"] {
-            background: #111827 !important;
-            color: #ffffff !important;
-        }
-
-        /* Expander */
-        [data-testid="stExpander"],
-        [data-testid="stExpander"] summary,
-        [data-testid="stExpander"] [data-testid="stExpanderDetails"] {
-            background-color: var(--bg) !important;
-            color: var(--fg) !important;
-            border: 1px solid var(--border) !important;
-        }
-
-        .accented { color: #0066cc !important; font-weight: 600; }
-
-        /* === OVERRIDE nuclear: popover/selectbox siempre blanco en modo claro === */
-        :root body [data-baseweb="popover"],
-        :root body [data-baseweb="popover"] *,
-        :root body div[role="listbox"],
-        :root body div[role="listbox"] *,
-        :root body [data-baseweb="menu"],
-        :root body [data-baseweb="menu"] * {
-            background-color: #ffffff !important;
-            color: #111827 !important;
-            border-color: #d1d5db !important;
-        }
-        div[role="listbox"] [role="option"],
-        [data-baseweb="menu"] [role="option"],
-        [data-baseweb="menu"] li {
-            background-color: #ffffff !important;
-            color: #111827 !important;
-        }
-        div[role="listbox"] [role="option"]:hover,
-        div[role="listbox"] [role="option"][aria-selected="true"],
-        [data-baseweb="menu"] [role="option"]:hover,
-        [data-baseweb="menu"] [role="option"][aria-selected="true"],
-        [data-baseweb="menu"] li:hover {
-            background-color: #eef3f8 !important;
-            color: #111827 !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
 # -------------------------
 # Toggle de tema (antes del CSS)
 # -------------------------
+def _sync_theme():
+    # El callback s'executa abans del rerun: no cal un `st.rerun()` extra.
+    st.session_state.dark_mode = st.session_state["__theme_toggle"]
+
 with st.sidebar:
     toggle_label = "Canvia a mode fosc" if not st.session_state.dark_mode else "Canvia a mode clar"
-    new_dark = st.toggle(toggle_label, value=st.session_state.dark_mode, key="__theme_toggle")
-if new_dark != st.session_state.dark_mode:
-    st.session_state.dark_mode = new_dark
-    st.rerun()
+    st.toggle(toggle_label, value=st.session_state.dark_mode, key="__theme_toggle",
+              on_change=_sync_theme)
 
 # Inyectar CSS una sola vez
-inject_custom_css()
+with metrics.span("css"):
+    inject_custom_css()
 
 
 # -------------------------
 # Datos base (monosíl·labs)
 # -------------------------
-pares = [
-    ("bé", "be"), ("déu", "deu"), ("és", "es"), ("mà", "ma"),
-    ("més", "mes"), ("món", "mon"), ("pèl", "pel"), ("què", "que"),
-    ("sé", "se"), ("sòl", "sol"), ("són", "son"), ("té", "te"),
-    ("ús", "us"), ("vós", "vos"), ("sí", "si"),
-]
-
-parelles = {}
-for acent, sense in pares:
-    parelles[acent] = sense
-    parelles[sense] = acent
-
-monosilabos = {
-    "sí": {
-        "categoria": "adverbi d'afirmació",
-        "definicion": "Adverbi d'afirmació.",
-        "ejemplos": [
-            "Sí, vindré demà.",
-            "Va dir que sí a la proposta.",
-            "Sí que ho sabia.",
-            "I tant que sí!",
-            "Sí, estic d'acord amb tu.",
-            "Sí, és veritat.",
-            "Sí, això és correcte.",
-            "Em va dir que sí sense dubtar.",
-            "Sí, ho faré ara mateix.",
-            "Sí, ho he comprovat diverses vegades."
-        ]
-    },
-    "si": {
-        "categoria": "conjunció condicional",
-        "definicion": "Conjunció condicional.",
-        "ejemplos": [
-            "Si plou, ens quedem a casa.",
-            "Si estudies, aprovaràs.",
-            "Si vols, t'ajude.",
-            "Si tens temps, vine demà.",
-            "Si no ho proves, mai ho sabràs.",
-            "Si véns, porta menjar.",
-            "Si truques, et contestaré.",
-            "Si estàs malalt, queda't a casa.",
-            "Si treballes dur, tindràs èxit.",
-            "Si cau, es farà mal."
-        ]
-    },
-
-    "més": {
-        "categoria": "quantificador/comparatiu",
-        "definicion": "Comparatiu de quantitat ('més = más').",
-        "ejemplos": [
-            "Vull més aigua.",
-            "Això és més car que allò.",
-            "Necessitem més temps.",
-            "Cada dia estudie més hores.",
-            "Vol més cafè al matí.",
-            "Hi ha més gent a la plaça hui.",
-            "M'agrada més aquest llibre.",
-            "Necessites més paciència.",
-            "Ell corre més que jo.",
-            "Menja més fruita per estar sa."
-        ]
-    },
-    "mes": {
-        "categoria": "nom (mes del calendari)",
-        "definicion": "Nom del calendari.",
-        "ejemplos": [
-            "El mes de juny fa calor.",
-            "Cada mes estalvie un poc.",
-            "Aquest mes començarem.",
-            "El pròxim mes hi haurà vacances.",
-            "És el mes més llarg de l'any.",
-            "El mes passat vam viatjar.",
-            "Cada mes canvien els preus.",
-            "Va nàixer el mes de maig.",
-            "Este mes hem treballat molt.",
-            "El mes d'agost sol ser calorós."
-        ]
-    },
-
-    "bé": {
-        "categoria": "adverbi",
-        "definicion": "Adverbi ('bé = bien').",
-        "ejemplos": [
-            "Estic bé, gràcies.",
-            "Fes-ho bé, si us plau.",
-            "No m'ha paregut bé.",
-            "Treballa molt bé sota pressió.",
-            "Tot ha eixit bé al final.",
-            "Mira-ho bé abans de signar.",
-            "Ho has entés bé?",
-            "Em sembla bé la teua idea.",
-            "Va parlar molt bé al congrés.",
-            "M'ho he passat bé avui."
-        ]
-    },
-    "be": {
-        "categoria": "nom (animal jove)",
-        "definicion": "Nom: 'corder', 'ovella jove'.",
-        "ejemplos": [
-            "Va comprar un be al mercat.",
-            "El be pastura al camp.",
-            "Han nascut dos bens.",
-            "El be balava sense parar.",
-            "El pastor cuidava un be malalt.",
-            "El be va créixer ràpid.",
-            "Els bens juguen a l'herba.",
-            "Un be va fugir de l'estable.",
-            "Ha venut els bens al mercat.",
-            "El be estava amb la mare."
-        ]
-    },
-}
+@st.cache_resource
+def get_corpus():
+    """Corpus de `data/`, una vegada per procés i compartit entre sessions."""
+    pares = load_pares()
+    return pares, build_parelles(pares), Corpus()
+
+with metrics.span("corpus"):
+    pares, parelles, monosilabos = get_corpus()
+
+@st.cache_resource
+def get_context_model():
+    from context_model import load_model
+    return load_model()
+
+@st.cache_resource
+def get_checker():
+    return Checker(parelles, model=get_context_model())
+
+@st.cache_resource
+def get_search_index():
+    # També les formes de `pares` que encara no tenen fitxa al corpus (p. ex. déu/deu).
+    return SearchIndex(list(monosilabos) + [w for p in pares for w in p if w not in monosilabos])
+
 def search_suggestions(prefix: str):
-    inicial = prefix.strip().lower()[:1]
-    return sorted([w for w in monosilabos if w.lower().startswith(inicial)])
+    return get_search_index().suggest(prefix)
 # -------------------------
-# GitHub helpers (ranking)
+# Rànguing: backend configurable (GitHub o local)
 # -------------------------
-def _gh_headers():
-    return {
-        "Authorization": f"Bearer {st.secrets.get('GITHUB_TOKEN','')}",
-        "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
-
-def _gh_file_url():
-    owner_repo = st.secrets.get("GITHUB_REPO","")
-    branch = st.secrets.get("GITHUB_BRANCH", "main")
-    path = st.secrets.get("GITHUB_SCORES_PATH", "scores.jsonl")
-    return f"https://api.github.com/repos/{owner_repo}/contents/{path}?ref={branch}"
+@st.cache_resource
+def get_score_backend() -> ScoreBackend:
+    kind = _secret("SCORES_BACKEND", "github")
+    if kind == "sqlite":
+        # El rànguing ja ix ordenat de l'índex: ni caché compartida ni còpia en memòria.
+        return SQLiteStore(_secret("SQLITE_PATH", "scores.sqlite"))
+    if kind == "local":
+        backend = LocalShardedStore(_secret("SCORES_DIR", "scores_local"))
+    else:
+        backend = GitHubShardedStore(
+            repo=_secret("GITHUB_REPO", ""),
+            token=_secret("GITHUB_TOKEN", ""),
+            branch=_secret("GITHUB_BRANCH", "main"),
+            root=_secret("GITHUB_SCORES_DIR", "scores"),
+            legacy_path=_secret("GITHUB_SCORES_PATH", "scores.jsonl"),
+        )
+    # Amb diverses rèpliques: una sola consulta al backend per a totes.
+    shared = _secret("SHARED_CACHE_PATH")
+    if shared:
+        backend = SharedCacheBackend(backend, shared, ttl=15)
+    return backend
+
+@st.cache_resource
+def get_score_cache() -> ScoreCache:
+    # Amb peticions condicionals (304) un TTL curt ja no costa ample de banda.
+    return ScoreCache(get_score_backend(), name="scores", ttl=15, index=Leaderboard)
+
+@st.cache_resource
+def get_write_queue() -> WriteQueue:
+    """Una cua per procés: les sessions que guarden alhora comparteixen commit."""
+    return WriteQueue(get_score_backend())
+
+@st.cache_resource
+def get_outbox() -> Outbox:
+    """Bústia durable: guardar no espera la xarxa; un fil ho envia després."""
+    return Outbox(get_write_queue(), _secret("OUTBOX_DIR", "scores_outbox"),
+                  on_written=get_score_cache().apply_append)
+
+@st.cache_resource
+def resume_outbox() -> bool:
+    """En arrencar el procés: si ha quedat alguna puntuació d'una execució anterior,
+    arranca ja el fil que l'envia (sense esperar que algú torne a guardar)."""
+    try:
+        pending = any(name.endswith(".json") for name in os.listdir(_secret("OUTBOX_DIR", "scores_outbox")))
+    except OSError:
+        return False
+    if pending:
+        get_outbox()
+    return pending
 
-def _gh_put_url():
-    owner_repo = st.secrets.get("GITHUB_REPO","")
-    path = st.secrets.get("GITHUB_SCORES_PATH", "scores.jsonl")
-    return f"https://api.github.com/repos/{owner_repo}/contents/{path}"
+resume_outbox()
 
-@st.cache_data(ttl=60)
-def load_scores_from_github():
+def append_score(record: dict):
+    """Deixa la puntuació a la bústia i torna el seu id (o None si ni això ha anat bé)."""
     try:
-        r = requests.get(_gh_file_url(), headers=_gh_headers(), timeout=10)
-        if r.status_code == 404:
-            return [], None
-        r.raise_for_status()
-        data = r.json()
-        content_b64 = data.get("content","")
-        sha = data.get("sha")
-        content = base64.b64decode(content_b64).decode("utf-8", errors="ignore")
-        scores = []
-        for line in content.splitlines():
-            if line.strip():
-                scores.append(json.loads(line))
-        return scores, sha
+        return get_outbox().put(record)
     except Exception as e:
-        st.info(f"No s'ha pogut llegir el rànguing: {e}")
-        return [], None
+        st.info(f"No s'ha pogut guardar el rànguing: {e}")
+        return None
 
-def append_score_to_github(record: dict):
-    try:
-        scores, sha = load_scores_from_github()
-        lines = [json.dumps(s, ensure_ascii=False) for s in scores]
-        lines.append(json.dumps(record, ensure_ascii=False))
-        new_content = "\n".join(lines) + "\n"
-        payload = {
-            "message": f"Add score: {record.get('nom','')} {record.get('puntuacio','?')}/{record.get('total','?')}",
-            "content": base64.b64encode(new_content.encode("utf-8")).decode("utf-8"),
-            "branch": st.secrets.get("GITHUB_BRANCH", "main"),
-        }
-        if sha:
-            payload["sha"] = sha
-        r = requests.put(_gh_put_url(), headers=_gh_headers(), json=payload, timeout=15)
-        if r.status_code in (200, 201):
-            st.cache_data.clear()
-            return True
-        if r.status_code == 409:
-            time.sleep(0.8)
-            st.cache_data.clear()
-            return append_score_to_github(record)
-        r.raise_for_status()
-        st.cache_data.clear()
-        return True
-    except Exception as e:
-        st.info(f"No s'ha pogut guardar a GitHub: {e}")
-        return False
+def save_status(rid: str) -> str:
+    outbox = get_outbox()
+    if outbox.status(rid) == WRITTEN:
+        return "✅ Rànguing actualitzat."
+    if outbox.last_error:
+        return f"⏳ Puntuació guardada; s'enviarà quan es puga ({outbox.last_error})."
+    return "⏳ Puntuació guardada; s'està enviant al rànguing."
 
 
 # -------------------------
 # Utilidades varias
 # -------------------------
 def safe_rerun():
+    close_spans()
     try:
         st.rerun()
     except Exception:
@@ -528,6 +244,12 @@ def safe_rerun():
             pass
 
 def display_word_info(paraula: str):
+    if paraula not in monosilabos:
+        st.markdown(f"### — {paraula} —")
+        if paraula in parelles:
+            st.write("**Parella diacrítica:**", f"{paraula} / {parelles[paraula]}")
+        st.caption("Encara no hi ha definició ni exemples d'aquesta forma al corpus.")
+        return
     info = monosilabos[paraula]
 
     st.markdown(f"### — {paraula} —")
@@ -590,107 +312,156 @@ def display_word_info(paraula: str):
 # -------------------------
 # Quiz helpers
 # -------------------------
-def make_cloze(sentence: str, word: str) -> str:
-    return re.sub(rf"\b{re.escape(word)}\b", "_____", sentence, count=1)
-
-def generar_preguntas(n=10):
-    preguntas = []
-    bolsa = []
-    for w, info in monosilabos.items():
-        if w in parelles and parelles[w] in monosilabos:
-            for ex in info["ejemplos"]:
-                if re.search(rf"\b{re.escape(w)}\b", ex):
-                    bolsa.append((w, ex))
-    random.shuffle(bolsa)
-    for w, ex in bolsa[:n]:
-        pareja = parelles[w]
-        preguntas.append({
-            "enunciado": make_cloze(ex, w),
-            "correcta": w,
-            "opciones": random.sample([w, pareja], k=2),
-            "pareja": pareja,
-        })
-    return preguntas
+@st.cache_resource
+def get_question_pool():
+    """Totes les preguntes possibles, calculades una vegada per procés."""
+    return quiz_engine.build_pool(monosilabos, parelles)
+
+@st.cache_resource
+def get_pool_groups():
+    """Ítems del pool per parella (en l'ordre de `pares`, com `MasteryStore`)."""
+    return quiz_engine.group_by_pair(get_question_pool(), pares)
+
+@st.cache_resource
+def get_mastery() -> MasteryStore:
+    """Domini per alumne, compartit per totes les sessions; es desa a SQLite en lots."""
+    return MasteryStore(pares, path=_secret("MASTERY_PATH", "mastery.sqlite"))
+
+def learner_key() -> str:
+    """El nom amb què l'alumne ha guardat alguna vegada, o un id d'aquesta sessió."""
+    if "learner_id" not in st.session_state:
+        st.session_state.learner_id = SESSION_PREFIX + uuid.uuid4().hex[:12]
+    return st.session_state.get("learner_name") or st.session_state.learner_id
 
 def generar_quiz(n=10):
-    preguntas = generar_preguntas(n)
-    return {"preguntas": preguntas, "respuestas": [None]*len(preguntas)}
+    """Més preguntes de les parelles que l'alumne falla més."""
+    pool = get_question_pool()
+    quiz = quiz_engine.generar_quiz(pool, n, weights=get_mastery().weights(learner_key()),
+                                    groups=get_pool_groups())
+    quiz["respondides"] = 0
+    # Els selectbox guarden la resposta en `sel_{i}`: sense esborrar-los, el quiz
+    # nou mostraria les respostes de l'anterior amb `respuestas` a None.
+    for k in [k for k in st.session_state if str(k).startswith("sel_")]:
+        del st.session_state[k]
+    return quiz
 
 def show_quiz_progress(answered: int, total: int):
     st.progress(answered/max(1,total))
     st.caption(f"Respostes: {answered}/{total}")
 
+# Cada pregunta és un fragment: canviar una resposta només la repinta a ella
+# i la barra de progrés. Sense `st.fragment` (Streamlit antic) es repinta tot.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+NO_ANSWER = "— Selecciona —"
+
+def _answer_changed(i: int):
+    quiz = st.session_state.quiz
+    sel = st.session_state[f"sel_{i}"]
+    new = None if sel == NO_ANSWER else sel
+    old = quiz["respuestas"][i]
+    quiz["respuestas"][i] = new
+    total = len(quiz["preguntas"])
+    before = quiz["respondides"] == total
+    quiz["respondides"] += (new is not None) - (old is not None)
+    st.session_state.quiz_progress_dirty = True
+    # Completar (o descompletar) el quiz canvia el botó "Corregir": cal un rerun sencer.
+    if before != (quiz["respondides"] == total):
+        st.session_state.quiz_full_rerun = True
+
+@fragment
+def quiz_question(i: int, progress):
+    quiz = st.session_state.quiz
+    q = quiz["preguntas"][i]
+    st.markdown(f'<div class="quiz-question"><h4>Pregunta {i+1}</h4>'
+                f'<p style="margin:0.5rem 0 0.75rem 0">{q["enunciado"]}</p></div>',
+                unsafe_allow_html=True)
+    opts = [NO_ANSWER] + q["opciones"]
+    idx = opts.index(quiz["respuestas"][i]) if quiz["respuestas"][i] in q["opciones"] else 0
+    st.selectbox("Tria la forma correcta:", options=opts, index=idx, key=f"sel_{i}",
+                 on_change=_answer_changed, args=(i,))
+    st.divider()
+    if st.session_state.pop("quiz_full_rerun", False):
+        safe_rerun()
+    if st.session_state.pop("quiz_progress_dirty", False):
+        with progress.container():
+            show_quiz_progress(quiz["respondides"], len(quiz["preguntas"]))
+
 
 # -------------------------
 # Ranking (único render)
 # -------------------------
+RANKING_PAGE = 20
+
 def render_ranking():
     """Render estable:
        - Mode fosc -> st.dataframe (interactiu)
        - Mode clar -> st.table (HTML, sense canvas negre)
+       Només la mida triada i les primeres `RANKING_PAGE` files ("Carrega'n més").
     """
     if st.button("🔄 Actualitza rànguing", key="refresh_ranking_btn"):
-        st.cache_data.clear()
+        get_score_cache().invalidate()
         safe_rerun()
 
-    scores, _ = load_scores_from_github()
-    if not scores:
+    try:
+        with metrics.span("ranking_index"):
+            lb = get_score_backend().leaderboard() or get_score_cache().get_index()
+    except Exception as e:
+        st.info(f"No s'ha pogut llegir el rànguing: {e}")
+        return
+    counts = {n: lb.count(n) for n in SIZES} if lb else {}
+    if not any(counts.values()):
         st.info("Encara no hi ha puntuacions.")
         return
 
     dark = st.session_state.get("dark_mode", False)
 
-    for n_preg in [5, 10, 20]:
-        subset = [s for s in scores if s.get("total") == n_preg]
-        if not subset:
-            continue
-
-        # ordenar per % i data
-        def pct(r): return (r.get("puntuacio", 0) / max(1, r.get("total", 1)))
-        def dt(s): 
-            try:
-                return datetime.strptime(s or "", "%Y-%m-%d %H:%M")
-            except Exception:
-                return datetime.min
-
-        subset_sorted = sorted(subset, key=lambda r: (pct(r), dt(r.get("data",""))), reverse=True)
-
-        rows = []
-        for r in subset_sorted:
-            num = r.get("puntuacio", 0)
-            den = max(1, r.get("total", 1))
-            rows.append({
-                "Nom": r.get("nom", "—"),
-                "Punts": f"{num}/{den}",
-                "%": round(100 * num / den),
-                "Data": r.get("data", "—"),
-            })
-        df = pd.DataFrame(rows)
-
-        with st.expander(f"Rànguing {n_preg} preguntes", expanded=(n_preg == 10)):
-            if dark:
-                st.dataframe(df, hide_index=True, use_container_width=True)
-            else:
-                styler = (
-                    df.style
-                      .set_properties(**{
-                          "background-color": "#ffffff",
-                          "color": "#111827",
-                          "border-color": "#e5e7eb",
-                          "border-width": "1px",
-                          "border-style": "solid"
-                      })
-                      .set_table_styles([
-                          {"selector": "thead th",
-                           "props": "background-color:#f8f9fa; color:#111827; border:1px solid #e5e7eb;"},
-                          {"selector": "tbody td",
-                           "props": "border:1px solid #e5e7eb;"},
-                          {"selector": "tbody tr:nth-child(even) td",
-                           "props": "background-color:#fcfcfc;"}
-                      ])
-                      .hide(axis="index")
-                )
-                st.table(styler)
+    # Només es construeix la taula triada, i només la part visible (top-K).
+    sizes = [n for n in SIZES if counts[n]]
+    n_preg = st.radio("Rànguing de:", sizes, index=sizes.index(10) if 10 in sizes else 0,
+                      format_func=lambda n: f"{n} preguntes", horizontal=True,
+                      key="ranking_size")
+    key_lim = f"ranking_limit_{n_preg}"
+    if key_lim not in st.session_state:
+        st.session_state[key_lim] = RANKING_PAGE
+    limit = st.session_state[key_lim]
+    total = counts[n_preg]
+    table_span = metrics.start("ranking_table", dark=dark)
+    import pandas as pd  # només aquesta vista en necessita (uns 400 ms en arrencar)
+    df = pd.DataFrame(lb.rows(n_preg, limit))
+
+    if dark:
+        st.dataframe(df, hide_index=True, use_container_width=True)
+    else:
+        styler = (
+            df.style
+              .set_properties(**{
+                  "background-color": "#ffffff",
+                  "color": "#111827",
+                  "border-color": "#e5e7eb",
+                  "border-width": "1px",
+                  "border-style": "solid"
+              })
+              .set_table_styles([
+                  {"selector": "thead th",
+                   "props": "background-color:#f8f9fa; color:#111827; border:1px solid #e5e7eb;"},
+                  {"selector": "tbody td",
+                   "props": "border:1px solid #e5e7eb;"},
+                  {"selector": "tbody tr:nth-child(even) td",
+                   "props": "background-color:#fcfcfc;"}
+              ])
+              .hide(axis="index")
+        )
+        st.table(styler)
+    table_span.stop()
+
+    rejected = getattr(getattr(lb, "table", None), "rejected", 0)
+    if rejected:
+        st.caption(f"⚠️ {rejected} línies del fitxer de puntuacions no s'han pogut llegir i s'han saltat.")
+    if limit < total:
+        st.caption(f"Mostrant {limit} de {total}.")
+        if st.button("⬇️ Carrega'n més", key=f"ranking_more_{n_preg}"):
+            st.session_state[key_lim] = limit + RANKING_PAGE
+            safe_rerun()
 
 
 # -------------------------
@@ -713,6 +484,7 @@ with st.sidebar:
         "Acció",
         [
             "🔍 Cerca un monosíl·lab",
+            "✍️ Revisa un text",
             "🃏 Llista",
             "📚 Llista detallada",
             "🕘 Historial",
@@ -725,6 +497,7 @@ with st.sidebar:
     st.info(f"Versió: {datetime.now():%Y-%m-%d %H:%M:%S}")
 
 opcio = st.session_state.menu
+_spans.append(metrics.start("view", view=opcio))
 
 # -------------------------
 # Vistas
@@ -744,19 +517,52 @@ if opcio == "🔍 Cerca un monosíl·lab":
         search_clicked = st.button("Cerca", key="search_btn")
 
     if paraula_input or search_clicked:
-        p = st.session_state.get("search_input","").strip().lower()
-        if p in monosilabos:
-            if not st.session_state.historial or st.session_state.historial[-1] != p:
-                st.session_state.historial.append(p)
-            display_word_info(p)
+        p = normalize(st.session_state.get("search_input",""))
+        trobades = get_search_index().lookup(p)
+        if trobades:
+            w = trobades[0]
+            if w != p:
+                st.caption(f"Resultat per a **{w}** (sense tindre en compte els accents).")
+            if not st.session_state.historial or st.session_state.historial[-1] != w:
+                st.session_state.historial.append(w)
+            display_word_info(w)
         else:
             st.warning("No està en la base de dades. Revisa l'accent.")
             sugerides = search_suggestions(p)
             if sugerides:
-                st.markdown("**Pistes (mateixa lletra inicial):** " + ", ".join(sugerides))
+                st.markdown("**Potser volies dir:** " + ", ".join(sugerides))
             else:
                 st.markdown("**Paraules disponibles:** " + ", ".join(sorted(monosilabos.keys())))
 
+elif opcio == "✍️ Revisa un text":
+    st.header("✍️ Revisa un text")
+    text = st.text_area("Enganxa el teu text:", height=200, key="check_text",
+                        placeholder="Es revisaran tots els monosíl·labs amb parella diacrítica…")
+    if text:
+        text = prepare(text)
+        checker = get_checker()
+        hits = checker.check(text)
+        if not hits:
+            st.success("Cap monosíl·lab amb accent diacrític a revisar.")
+        else:
+            suggestions = checker.suggest(text, hits)
+            st.info(f"{len(hits)} monosíl·labs a revisar.")
+            st.markdown(f'<div class="quiz-question">{highlight(text, hits, suggestions=suggestions)}</div>',
+                        unsafe_allow_html=True)
+            if suggestions:
+                st.markdown("**Segons el context, potser hi falta o hi sobra l'accent:**")
+                for h in hits:
+                    if h.start in suggestions:
+                        forma, prob = suggestions[h.start]
+                        context = text[max(0, h.start - 25):h.end + 25].replace("\n", " ")
+                        st.markdown(f"- «…{context}…»: **{h.token}** → **{forma}** ({prob:.0%})")
+            for forma, n in get_checker().summary(hits):
+                altra = parelles[forma]
+                st.markdown(f"**{forma}** ×{n} — comprova que no siga **{altra}**")
+                for w in (forma, altra):
+                    if w in monosilabos:
+                        st.caption(f"{w}: {monosilabos[w]['definicion']}")
+
 elif opcio == "🃏 Llista":
     st.header("🃏 Llista en parelles")
     for acent, sense in pares:
@@ -803,6 +609,7 @@ elif opcio == "📝 Mini-quiz":
         if st.button("Nou quiz", type="primary"):
             st.session_state.quiz_corrected = False
             st.session_state.last_score = {}
+            st.session_state.pop("saved_rid", None)
             st.session_state.quiz = generar_quiz(st.session_state.quiz_n)
             safe_rerun()
 
@@ -810,29 +617,28 @@ elif opcio == "📝 Mini-quiz":
     if not quiz:
         st.info("Prem **Nou quiz** per a començar.")
     else:
-        answered = sum(1 for r in quiz["respuestas"] if r is not None)
-        show_quiz_progress(answered, len(quiz["preguntas"]))
-
-        for i, q in enumerate(quiz["preguntas"]):
-            st.markdown(f'<div class="quiz-question"><h4>Pregunta {i+1}</h4>'
-                        f'<p style="margin:0.5rem 0 0.75rem 0">{q["enunciado"]}</p></div>',
-                        unsafe_allow_html=True)
-            opts = ["— Selecciona —"] + q["opciones"]
-            idx = opts.index(quiz["respuestas"][i]) if quiz["respuestas"][i] in q["opciones"] else 0
-            sel = st.selectbox("Tria la forma correcta:", options=opts, index=idx, key=f"sel_{i}")
-            quiz["respuestas"][i] = None if sel == "— Selecciona —" else sel
-            st.divider()
-
-        answered = sum(1 for r in quiz["respuestas"] if r is not None)
-        if answered == len(quiz["preguntas"]):
-            if st.button("✅ Corregir", type="primary"):
-                correctes = sum(r == q["correcta"] for r, q in zip(quiz["respuestas"], quiz["preguntas"]) if r)
-                total = len(quiz["preguntas"])
-                st.session_state.quiz_corrected = True
-                st.session_state.last_score = {"puntuacio": correctes, "total": total, "nom": st.session_state.last_score.get("nom","")}
-                safe_rerun()
-        else:
-            st.warning(f"Respon totes les preguntes ({answered}/{len(quiz['preguntas'])}).")
+        total = len(quiz["preguntas"])
+        quiz.setdefault("respondides", sum(1 for r in quiz["respuestas"] if r is not None))
+        progress = st.empty()
+        with progress.container():
+            show_quiz_progress(quiz["respondides"], total)
+        st.session_state.pop("quiz_full_rerun", None)
+        st.session_state.pop("quiz_progress_dirty", None)
+
+        for i in range(total):
+            quiz_question(i, progress)
+
+        # Una sola correcció per quiz: tornar a corregir comptaria dues vegades les respostes al domini.
+        if not st.session_state.get("quiz_corrected"):
+            if quiz["respondides"] == total:
+                if st.button("✅ Corregir", type="primary"):
+                    correctes = quiz_engine.corregir(quiz)
+                    get_mastery().record_quiz(learner_key(), quiz)
+                    st.session_state.quiz_corrected = True
+                    st.session_state.last_score = {"puntuacio": correctes, "total": total, "nom": st.session_state.last_score.get("nom","")}
+                    safe_rerun()
+            else:
+                st.warning("Respon totes les preguntes per a poder corregir.")
 
         if st.session_state.get("quiz_corrected"):
             score = st.session_state.get("last_score", {})
@@ -842,20 +648,25 @@ elif opcio == "📝 Mini-quiz":
             colA, colB, colC = st.columns(3)
             with colA:
                 if st.button("💾 Guardar rànguing"):
-                    record = {
-                        "nom": st.session_state.last_score.get("nom",""),
-                        "puntuacio": score.get("puntuacio",0),
-                        "total": score.get("total",0),
-                        "data": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    }
-                    st.session_state.scores.append(record)
-                    ok = append_score_to_github(record)
-                    if ok:
-                        st.success("Rànguing a GitHub actualitzat.")
+                    record = quiz_engine.score_record(
+                        st.session_state.last_score.get("nom",""),
+                        score.get("puntuacio",0),
+                        score.get("total",0),
+                    )
+                    st.session_state.saved_rid = append_score(record)
+                    nom = record["nom"].strip()
+                    if nom and not st.session_state.get("learner_name"):
+                        get_mastery().merge(st.session_state.learner_id, nom)
+                    if nom:
+                        st.session_state.learner_name = nom
+            rid = st.session_state.get("saved_rid")
+            if rid:
+                st.caption(save_status(rid))
             with colB:
                 if st.button("📝 Nou quiz"):
                     st.session_state.quiz_corrected = False
                     st.session_state.last_score = {}
+                    st.session_state.pop("saved_rid", None)
                     st.session_state.quiz = generar_quiz(st.session_state.quiz_n)
                     safe_rerun()
             with colC:
@@ -866,3 +677,17 @@ elif opcio == "📝 Mini-quiz":
 elif opcio == "🏆 Rànguing Quiz":
     st.header("🏆 Rànguing Quiz")
     render_ranking()
+
+close_spans()
+
+# -------------------------
+# Panell de depuració (només amb les mètriques actives)
+# -------------------------
+if metrics.ENABLED:
+    with st.sidebar.expander("🐞 Temps per procés"):
+        rows = metrics.snapshot()
+        if rows:
+            import pandas as pd
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        if st.button("Buida les mètriques", key="metrics_reset"):
+            metrics.reset()
@@ -0,0 +1,73 @@
+# =========================
+# bench/cache_order.py — Ordre del rànguing després de guardar
+# =========================
+"""Comprovació de regressió de `ScoreCache`: guardar → recarregar → guardar.
+
+Després d'un guardat propi, la recàrrega pot tornar la mateixa versió i el
+mateix nombre de files, però en una taula nova amb les files en un altre
+ordre (el dels shards). Si l'índex es reaprofitava, els seus números de fila
+apuntaven a una altra taula i el rànguing eixia desordenat.
+
+    python bench/cache_order.py
+
+Prova `LocalShardedStore` i `GitHubShardedStore` (contra el GitHub fals) i
+ix amb codi 1 si algun rànguing no està ordenat.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from fake_github import serve  # noqa: E402
+from leaderboard import Leaderboard  # noqa: E402
+from scores_store import GitHubShardedStore, LocalShardedStore, ScoreCache  # noqa: E402
+
+
+def record(nom: str, punts: int, day: str) -> dict:
+    return {"nom": nom, "puntuacio": punts, "total": 10, "data": f"{day} 10:00"}
+
+
+def save(cache: ScoreCache, backend, rec: dict):
+    """El que fa la bústia: escriure al backend i afegir-ho a la caché."""
+    cache.apply_append([rec], backend.append_many([rec]))
+
+
+def check(name: str, backend) -> bool:
+    cache = ScoreCache(backend, ttl=0, index=Leaderboard)
+    # Dies diferents: l'ordre dels shards no és el d'arribada.
+    save(cache, backend, record("A", 9, "2025-01-03"))
+    cache.get_index()
+    save(cache, backend, record("B", 5, "2025-01-01"))
+    cache.get_index()  # recàrrega: mateixa versió i mida, taula nova
+    save(cache, backend, record("C", 1, "2025-01-02"))
+    rows = cache.get_index().rows(10)
+    cache.ttl = 3600
+    save(cache, backend, record("D", 7, "2025-01-04"))
+    rows_after = cache.get_index().rows(10)
+    ok = True
+    for label, got, expected in (("recàrrega", rows, ["A", "B", "C"]),
+                                 ("guardat", rows_after, ["A", "D", "B", "C"])):
+        names = [r["Nom"] for r in got]
+        good = names == expected
+        ok &= good
+        print(f"{name:8s} {label:10s} {' '.join(names):12s} {'ok' if good else f'ERROR (esperat {expected})'}")
+    return ok
+
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        ok &= check("local", LocalShardedStore(tmp))
+    server, _, url = serve()
+    try:
+        ok &= check("github", GitHubShardedStore("bench/ranking", api=url, compact_every=0))
+    finally:
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
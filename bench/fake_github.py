@@ -0,0 +1,255 @@
+# =========================
+# bench/fake_github.py — GitHub fals per a proves locals
+# =========================
+"""Servidor HTTP mínim que imita les parts de l'API de GitHub que usa el rànguing.
+
+Rutes suportades (qualsevol owner/repo):
+    GET  /repos/<o>/<r>/contents/<path>?ref=<branch>
+    PUT  /repos/<o>/<r>/contents/<path>       (409 si el sha no quadra)
+    GET  /repos/<o>/<r>/git/trees/<branch o sha>?recursive=1  (ETag / 304)
+    GET  /repos/<o>/<r>/git/blobs/<sha>     (cru amb `Accept: ...raw`, si no JSON+base64)
+    GET  /repos/<o>/<r>/git/ref/heads/<branch>
+    GET  /repos/<o>/<r>/git/commits/<sha>
+    POST /repos/<o>/<r>/git/trees           (base_tree + entrades amb content/sha/null)
+    POST /repos/<o>/<r>/git/commits
+    PATCH /repos/<o>/<r>/git/refs/heads/<branch>   (422 si no és fast-forward)
+
+Només hi ha una branca. `bytes_in` compta els bytes pujats (cossos de PUT/POST/PATCH).
+
+Ús:
+    python bench/fake_github.py --port 8765 --latency 0.05
+"""
+import argparse
+import base64
+import hashlib
+import json
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, files=None):
+        self.lock = threading.Lock()
+        self.files = dict(files or {})  # path -> bytes (estat del cap de la branca)
+        self.commits = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_in = 0
+        self.blobs = {}    # sha -> bytes
+        self.trees = {}    # sha -> {path: bytes}
+        self.objects = {}  # sha del commit -> {"tree": sha, "parents": [...]}
+        self.head = self.commit(self.snapshot(self.files), [])
+
+    def tree_sha(self) -> str:
+        return self._tree_sha(self.files)
+
+    @staticmethod
+    def _tree_sha(files: dict) -> str:
+        h = hashlib.sha1()
+        for path in sorted(files):
+            h.update(path.encode() + b"\0" + blob_sha(files[path]).encode())
+        return h.hexdigest()
+
+    def snapshot(self, files: dict) -> str:
+        for data in files.values():
+            self.blobs[blob_sha(data)] = data
+        sha = self._tree_sha(files)
+        self.trees[sha] = dict(files)
+        return sha
+
+    def commit(self, tree: str, parents: list) -> str:
+        sha = hashlib.sha1(f"{tree} {parents} {len(self.objects)}".encode()).hexdigest()
+        self.objects[sha] = {"tree": tree, "parents": list(parents)}
+        return sha
+
+    def move_head(self, commit: str):
+        self.head = commit
+        self.files = dict(self.trees[self.objects[commit]["tree"]])
+        self.commits += 1
+
+    def blob(self, sha: str):
+        return self.blobs.get(sha)
+
+
+def make_handler(repo: FakeRepo, latency: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # capçaleres i cos van en dos write(): sense açò, 40 ms d'ACK retardat
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body=None, etag=None):
+            raw = b"" if status == 304 else json.dumps(body or {}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _send_raw(self, data: bytes):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.github.raw")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            parts = urlsplit(self.path).path.strip("/").split("/")
+            # repos/<o>/<r>/<kind>/...
+            if len(parts) < 5 or parts[0] != "repos":
+                return None, None
+            return parts[3], "/".join(parts[4:])
+
+        def do_GET(self):
+            time.sleep(latency)
+            kind, rest = self._route()
+            with repo.lock:
+                repo.requests += 1
+                if kind == "contents":
+                    data = repo.files.get(rest)
+                    if data is None:
+                        return self._send(404, {"message": "Not Found"})
+                    return self._send(200, {"path": rest, "sha": blob_sha(data),
+                                            "content": base64.b64encode(data).decode()})
+                if kind == "git" and rest.startswith("trees/"):
+                    ref = rest.split("/", 1)[1]
+                    files = repo.trees.get(ref, repo.files)
+                    sha = repo._tree_sha(files)
+                    etag = f'"{sha}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        repo.not_modified += 1
+                        return self._send(304, etag=etag)
+                    tree = [{"path": p, "type": "blob", "sha": blob_sha(d), "size": len(d)}
+                            for p, d in sorted(files.items())]
+                    return self._send(200, {"sha": sha, "tree": tree, "truncated": False}, etag=etag)
+                if kind == "git" and rest.startswith("ref/heads/"):
+                    return self._send(200, {"ref": "refs/" + rest[len("ref/"):],
+                                            "object": {"sha": repo.head, "type": "commit"}})
+                if kind == "git" and rest.startswith("commits/"):
+                    obj = repo.objects.get(rest.split("/", 1)[1])
+                    if obj is None:
+                        return self._send(404, {"message": "Not Found"})
+                    return self._send(200, {"sha": rest.split("/", 1)[1], "tree": {"sha": obj["tree"]},
+                                            "parents": [{"sha": p} for p in obj["parents"]]})
+                if kind == "git" and rest.startswith("blobs/"):
+                    data = repo.blob(rest.split("/", 1)[1])
+                    if data is None:
+                        return self._send(404, {"message": "Not Found"})
+                    if "raw" in self.headers.get("Accept", ""):
+                        return self._send_raw(data)
+                    return self._send(200, {"content": base64.b64encode(data).decode(),
+                                            "encoding": "base64"})
+            self._send(404, {"message": "Not Found"})
+
+        def _body(self) -> dict:
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with repo.lock:
+                repo.bytes_in += len(raw)
+            return json.loads(raw or b"{}")
+
+        def do_POST(self):
+            body = self._body()
+            time.sleep(latency)
+            kind, rest = self._route()
+            with repo.lock:
+                repo.requests += 1
+                if kind == "git" and rest == "trees":
+                    files = dict(repo.trees.get(body.get("base_tree"), {}))
+                    for e in body.get("tree", []):
+                        if "content" in e:
+                            files[e["path"]] = e["content"].encode("utf-8")
+                        elif e.get("sha") is None:
+                            files.pop(e["path"], None)
+                        else:
+                            data = repo.blob(e["sha"])
+                            if data is None:
+                                return self._send(422, {"message": f"blob {e['sha']} not found"})
+                            files[e["path"]] = data
+                    return self._send(201, {"sha": repo.snapshot(files)})
+                if kind == "git" and rest == "commits":
+                    if body.get("tree") not in repo.trees:
+                        return self._send(422, {"message": "tree not found"})
+                    sha = repo.commit(body["tree"], body.get("parents", []))
+                    return self._send(201, {"sha": sha, "tree": {"sha": body["tree"]}})
+            self._send(404, {"message": "Not Found"})
+
+        def do_PATCH(self):
+            body = self._body()
+            time.sleep(latency)
+            kind, rest = self._route()
+            if kind != "git" or not rest.startswith("refs/heads/"):
+                return self._send(404, {"message": "Not Found"})
+            with repo.lock:
+                repo.requests += 1
+                obj = repo.objects.get(body.get("sha"))
+                if obj is None:
+                    return self._send(422, {"message": "Object does not exist"})
+                if not body.get("force") and repo.head not in obj["parents"]:
+                    return self._send(422, {"message": "Update is not a fast forward"})
+                repo.move_head(body["sha"])
+                return self._send(200, {"object": {"sha": repo.head, "type": "commit"}})
+
+        def do_PUT(self):
+            body = self._body()
+            time.sleep(latency)
+            kind, path = self._route()
+            if kind != "contents":
+                return self._send(404, {"message": "Not Found"})
+            with repo.lock:
+                repo.requests += 1
+                current = repo.files.get(path)
+                if current is not None and body.get("sha") != blob_sha(current):
+                    return self._send(409, {"message": f"{path} does not match"})
+                if current is None and body.get("sha"):
+                    return self._send(409, {"message": f"{path} does not exist"})
+                data = base64.b64decode(body.get("content", ""))
+                files = dict(repo.files)
+                files[path] = data
+                repo.move_head(repo.commit(repo.snapshot(files), [repo.head]))
+                return self._send(201 if current is None else 200, {
+                    "content": {"path": path, "sha": blob_sha(data)},
+                    "commit": {"sha": f"{repo.commits:040x}", "tree": {"sha": repo.tree_sha()}},
+                })
+
+    return Handler
+
+
+def serve(port: int = 0, latency: float = 0.0, files=None, certfile=None):
+    """Arranca el servidor en un fil. Torna (server, repo, url_base).
+
+    Amb `certfile` (certificat i clau en un PEM) serveix HTTPS.
+    """
+    repo = FakeRepo(files)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(repo, latency))
+    scheme = "http"
+    if certfile:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(certfile)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, repo, f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    args = ap.parse_args()
+    server, _, url = serve(args.port, args.latency)
+    print(f"GitHub fals a {url} (Ctrl+C per a parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,82 @@
+# =========================
+# bench/http_pool.py — Connexions noves vs sessió compartida
+# =========================
+"""Latència per crida a `GitHubShardedStore.load()` contra el GitHub fals.
+
+    python bench/http_pool.py --calls 200 --latency 0.0
+
+Compara `requests.get`/`requests.put` a soles (una connexió nova, i un
+handshake TLS, per crida) amb la sessió compartida de `http_session()`.
+Si hi ha `openssl`, el servidor fals serveix HTTPS amb un certificat
+autosignat; si no, HTTP.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from fake_github import serve  # noqa: E402
+from scores_store import GitHubShardedStore, make_session  # noqa: E402
+
+
+def self_signed_cert(tmp: str):
+    """PEM amb certificat i clau per a 127.0.0.1, o None si no hi ha `openssl`."""
+    if not shutil.which("openssl"):
+        return None
+    key, crt = os.path.join(tmp, "key.pem"), os.path.join(tmp, "crt.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key, "-out", crt, "-subj", "/CN=127.0.0.1",
+                    "-addext", "subjectAltName=IP:127.0.0.1"],
+                   check=True, capture_output=True)
+    pem = os.path.join(tmp, "server.pem")
+    with open(pem, "wb") as out:
+        for path in (crt, key):
+            with open(path, "rb") as f:
+                out.write(f.read())
+    return crt, pem
+
+
+def timed_loads(store: GitHubShardedStore, calls: int) -> list:
+    store.load()  # primera lectura: arbre i blobs
+    out = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        store.load()  # 304: només el cost de la connexió i la petició
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--http", action="store_true", help="sense TLS encara que hi haja openssl")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert = None if args.http else self_signed_cert(tmp)
+        if cert:
+            os.environ["REQUESTS_CA_BUNDLE"] = cert[0]
+        files = {"scores/10/2025-01-01.jsonl":
+                 b'{"nom": "a", "puntuacio": 7, "total": 10, "data": "2025-01-01 10:00"}\n'}
+        server, repo, url = serve(latency=args.latency, files=files,
+                                  certfile=cert[1] if cert else None)
+        print(f"servidor: {url}")
+        for label, session in (("requests.get (sense pool)", requests),
+                               ("sessió compartida", make_session())):
+            ms = timed_loads(GitHubShardedStore("classe/ranking", api=url, session=session), args.calls)
+            print(f"{label:28s} mediana {statistics.median(ms):7.2f} ms   "
+                  f"p95 {sorted(ms)[int(len(ms) * 0.95) - 1]:7.2f} ms")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
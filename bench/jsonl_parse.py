@@ -0,0 +1,111 @@
+# =========================
+# bench/jsonl_parse.py — Lectura de JSONL gran
+# =========================
+"""Temps i memòria de llegir un shard de puntuacions d'1M de línies.
+
+    python bench/jsonl_parse.py --lines 1000000 --bad 0.001
+
+Compara la lectura d'abans (`b64decode` sencer + `splitlines` + `json.loads`)
+amb la de `jsonl_stream` (per trossos, tolerant a línies corruptes), amb
+`json` de la biblioteca estàndard i amb `orjson` si hi és. La memòria és
+el pic de `tracemalloc`, en una passada a banda.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jsonl_stream  # noqa: E402
+from jsonl_stream import b64_chunks, iter_lines  # noqa: E402
+from score_table import ScoreTable  # noqa: E402
+
+
+def make_payload(n: int, bad: float, seed: int = 1) -> bytes:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        if rng.random() < bad:
+            lines.append('{"nom": "trencat", "puntuacio": ')
+            continue
+        total = rng.choice((5, 10, 20))
+        lines.append(json.dumps({
+            "nom": f"alumne{rng.randrange(5000)}", "puntuacio": rng.randrange(total + 1), "total": total,
+            "data": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} "
+                    f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+        }, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def old_way(b64: str) -> ScoreTable:
+    """La lectura d'abans: tot en memòria i la primera línia dolenta ho para tot."""
+    content = base64.b64decode(b64).decode("utf-8", errors="ignore")
+    t = ScoreTable()
+    try:
+        for line in content.splitlines():
+            if line.strip():
+                t.append_record(json.loads(line))
+    except ValueError:
+        return ScoreTable()  # el `except` de fora: rànguing buit
+    return t
+
+
+def stream_b64(b64: str) -> ScoreTable:
+    return ScoreTable().extend_jsonl(iter_lines(b64_chunks(b64)))
+
+
+def stream_raw(raw: bytes) -> ScoreTable:
+    chunks = (raw[i:i + jsonl_stream.CHUNK] for i in range(0, len(raw), jsonl_stream.CHUNK))
+    return ScoreTable().extend_jsonl(iter_lines(chunks))
+
+
+def measure(fn, arg, memory: bool):
+    if memory:
+        tracemalloc.start()
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+    t0 = time.perf_counter()
+    t = fn(arg)
+    return time.perf_counter() - t0, len(t), t.rejected
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=1_000_000)
+    ap.add_argument("--bad", type=float, default=0.001, help="fracció de línies corruptes")
+    ap.add_argument("--no-memory", action="store_true")
+    args = ap.parse_args()
+
+    raw = make_payload(args.lines, args.bad)
+    b64 = base64.encodebytes(raw).decode("ascii")  # amb salts de línia, com GitHub
+    print(f"{args.lines} línies, {len(raw) / 1e6:.1f} MB ({len(b64) / 1e6:.1f} MB en base64)")
+
+    parsers = [("orjson", jsonl_stream.loads)] if jsonl_stream.orjson else []
+    parsers.append(("json", json.loads))
+    clean = b"".join(line + b"\n" for line in raw.splitlines() if not line.endswith(b": "))
+    cases = [("abans, amb línies corruptes", old_way, b64, None),
+             ("abans, sense línies corruptes", old_way, base64.encodebytes(clean).decode("ascii"), None)]
+    for name, loads in parsers:
+        cases.append((f"streaming b64, {name}", stream_b64, b64, loads))
+        cases.append((f"streaming cru, {name}", stream_raw, raw, loads))
+
+    default = jsonl_stream.loads
+    for label, fn, arg, loads in cases:
+        jsonl_stream.loads = loads or json.loads
+        secs, rows, rejected = measure(fn, arg, memory=False)
+        line = f"{label:30s} {secs:6.2f} s  {rows:8d} files  {rejected:5d} descartades"
+        if not args.no_memory:
+            line += f"  pic {measure(fn, arg, memory=True) / 1e6:7.1f} MB"
+        print(line)
+    jsonl_stream.loads = default
+
+
+if __name__ == "__main__":
+    main()
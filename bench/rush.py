@@ -0,0 +1,55 @@
+# =========================
+# bench/rush.py — Simula una classe guardant puntuacions alhora
+# =========================
+"""N fils criden `WriteQueue.submit` a la vegada contra el GitHub fals.
+
+    python bench/rush.py --students 30 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_github import serve  # noqa: E402
+from scores_store import GitHubShardedStore, WriteQueue  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--students", type=int, default=30)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--window", type=float, default=0.25)
+    args = ap.parse_args()
+
+    server, repo, url = serve(latency=args.latency)
+    queue = WriteQueue(GitHubShardedStore("classe/ranking", api=url), window=args.window)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    errors = []
+
+    def student(i):
+        try:
+            queue.submit({"nom": f"alumne{i}", "puntuacio": i % 11, "total": 10, "data": now})
+        except Exception as e:
+            errors.append(e)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=student, args=(i,)) for i in range(args.students)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    saved = sum(len(d.splitlines()) for d in repo.files.values())
+    print(f"{args.students} alumnes en {elapsed:.2f}s -> {saved} registres, "
+          f"{repo.commits} commits, {repo.requests} peticions, {len(errors)} errors")
+    print(queue.metrics)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
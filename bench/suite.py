@@ -0,0 +1,298 @@
+# =========================
+# bench/suite.py — Benchmarks dels camins calents de l'app
+# =========================
+"""Mesura els camins calents sense arrancar el servidor de Streamlit.
+
+    python bench/suite.py                      # escales completes
+    python bench/suite.py --quick              # només les escales menudes
+    python bench/suite.py --only search,ranking
+    python bench/suite.py --compare bench/results/abc1234.json
+
+Casos (entrades sintètiques i escalades):
+    pool      `build_pool` + `generar_preguntas` + `make_cloze`, corpus ×1/×10/×100
+    search    `SearchIndex.suggest` (el que crida `search_suggestions`), vocabulari ×1/×10/×100
+    parse     `GitHubShardedStore.load()` contra el GitHub fals, 10k-1M registres
+    ranking   `Leaderboard` (ordenació) + `rows()` + `pd.DataFrame` de `render_ranking`, 10k-1M
+    css       bytes de `inject_custom_css` i de tot un rerun (amb `AppTest`, sense servidor)
+
+Els resultats es guarden en JSON (per defecte `bench/results/<commit>.json`)
+per a comparar-los entre commits amb `--compare`.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import Corpus, build_parelles, load_pares  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+FILLERS = ("ahir", "demà", "potser", "segurament", "a casa", "al matí", "de nou", "ara")
+
+
+def timed(fn, repeat: int = 5) -> dict:
+    """Mediana i mínim (en ms) de `repeat` execucions."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": round(statistics.median(times), 4), "min_ms": round(min(times), 4), "repeat": repeat}
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return "desconegut"
+
+
+# -------------------------
+# Entrades sintètiques
+# -------------------------
+def synthetic_corpus(scale: int, seed: int = 0) -> dict:
+    """El corpus real amb `scale` vegades més exemples per paraula (frases variades)."""
+    rng = random.Random(seed)
+    base = Corpus()
+    out = {}
+    for w in base:
+        info = dict(base[w])
+        examples = list(info.get("ejemplos", ()))
+        extra = [f"{rng.choice(FILLERS).capitalize()}, {ex[0].lower()}{ex[1:]}"
+                 for _ in range(scale - 1) for ex in examples]
+        info["ejemplos"] = tuple(examples + extra)
+        out[w] = info
+    return out
+
+
+def synthetic_vocab(scale: int, seed: int = 0) -> list:
+    """Les formes de les parelles més paraules inventades, fins a ×`scale`."""
+    rng = random.Random(seed)
+    words = [w for p in load_pares() for w in p]
+    letters = "abcdefghilmnopqrstuvxàèéíòóú"
+    vocab = list(words)
+    while len(vocab) < len(words) * scale:
+        vocab.append(rng.choice(words) + "".join(rng.choice(letters) for _ in range(rng.randint(1, 4))))
+    return vocab
+
+
+def typo(word: str, rng) -> str:
+    i = rng.randrange(len(word))
+    op = rng.randrange(3)
+    if op == 0:
+        return word[:i] + word[i + 1:] or word
+    if op == 1:
+        return word[:i] + rng.choice("aeiou") + word[i:]
+    return word[:i] + rng.choice("aeiou") + word[i + 1:]
+
+
+def synthetic_records(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        total = rng.choice((5, 10, 20))
+        out.append({"nom": f"alumne{rng.randrange(5000)}", "puntuacio": rng.randrange(total + 1),
+                    "total": total, "data": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} "
+                                            f"{rng.randrange(24):02d}:{rng.randrange(60):02d}"})
+    return out
+
+
+# -------------------------
+# Casos
+# -------------------------
+def bench_pool(scales, repeat):
+    import quiz_engine
+
+    parelles = build_parelles(load_pares())
+    results = []
+    pares = load_pares()
+    pair_weights = [1.0 + (k % 3) for k in range(len(pares))]
+    for scale in scales:
+        corpus = synthetic_corpus(scale)
+        pool = quiz_engine.build_pool(corpus, parelles)
+        groups = quiz_engine.group_by_pair(pool, pares)
+        rng = random.Random(1)
+        sentences = [(item.frase, item.paraula) for item in pool]
+        results += [
+            {"case": "pool.build", "scale": scale, "items": len(pool),
+             **timed(lambda: quiz_engine.build_pool(corpus, parelles), repeat)},
+            {"case": "pool.generar_preguntas", "scale": scale, "n": 20,
+             **timed(lambda: [quiz_engine.generar_preguntas(pool, 20, rng) for _ in range(100)], repeat),
+             "per": "100 quizzes"},
+            {"case": "pool.generar_preguntas_ponderat", "scale": scale, "n": 20,
+             **timed(lambda: [quiz_engine.generar_preguntas(pool, 20, rng, pair_weights, groups)
+                              for _ in range(100)], repeat),
+             "per": "100 quizzes"},
+            {"case": "pool.make_cloze", "scale": scale, "items": len(sentences),
+             **timed(lambda: [quiz_engine.make_cloze(s, w) for s, w in sentences], repeat)},
+        ]
+    return results
+
+
+def bench_search(scales, repeat):
+    from search import SearchIndex
+
+    results = []
+    for scale in scales:
+        vocab = synthetic_vocab(scale)
+        rng = random.Random(2)
+        queries = [typo(rng.choice(vocab), rng) for _ in range(1000)]
+        index = SearchIndex(vocab)
+        results += [
+            {"case": "search.build", "scale": scale, "words": len(vocab), **timed(lambda: SearchIndex(vocab), repeat)},
+            {"case": "search.suggest", "scale": scale, "words": len(vocab),
+             **timed(lambda: [index.suggest(q) for q in queries], repeat), "per": "1000 consultes"},
+        ]
+    return results
+
+
+def bench_parse(sizes, repeat):
+    sys.path.insert(0, os.path.join(ROOT, "bench"))
+    from fake_github import serve
+    from scores_store import GitHubShardedStore, dump_record, group_by_shard
+
+    results = []
+    for n in sizes:
+        files = {}
+        for rel, group in group_by_shard(synthetic_records(n)).items():
+            files[f"scores/{rel}"] = "".join(dump_record(r) for r in group).encode("utf-8")
+        server, repo, url = serve(files=files)
+        try:
+            cold = timed(lambda: GitHubShardedStore("bench/ranking", api=url).load(), max(1, repeat // 2))
+            store = GitHubShardedStore("bench/ranking", api=url)
+            store.load()
+            warm = timed(store.load, repeat)
+        finally:
+            server.shutdown()
+        results += [
+            {"case": "parse.load_fred", "records": n, "shards": len(files), **cold},
+            {"case": "parse.load_304", "records": n, "shards": len(files), **warm},
+        ]
+    return results
+
+
+def bench_ranking(sizes, repeat):
+    import pandas as pd
+
+    from leaderboard import Leaderboard
+    from score_table import ScoreTable
+
+    results = []
+    for n in sizes:
+        table = ScoreTable.from_records(synthetic_records(n))
+        lb = Leaderboard(table)
+        results += [
+            {"case": "ranking.index", "records": n, **timed(lambda: Leaderboard(table), max(1, repeat // 2))},
+            {"case": "ranking.page", "records": n, "limit": 20,
+             **timed(lambda: pd.DataFrame(lb.rows(10, 20)), repeat)},
+            {"case": "ranking.all_rows", "records": n,
+             **timed(lambda: pd.DataFrame(lb.rows(10)), max(1, repeat // 2))},
+        ]
+    return results
+
+
+def bench_css(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    def walk(node) -> int:
+        total = 0
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        children = getattr(node, "children", None)
+        if isinstance(children, dict):
+            total += sum(walk(ch) for ch in children.values())
+        return total
+
+    results = []
+    for dark in (False, True):
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+        at.session_state["dark_mode"] = dark
+        t = timed(at.run, repeat)
+        results.append({"case": "css.payload", "dark": dark,
+                        "css_bytes": at.markdown[0].proto.ByteSize(),
+                        "rerun_bytes": walk(at._tree), "rerun": t})
+    return results
+
+
+# -------------------------
+# Execució i comparació
+# -------------------------
+def result_key(r: dict) -> tuple:
+    return tuple(sorted((k, v) for k, v in r.items()
+                        if k not in ("median_ms", "min_ms", "repeat", "rerun", "css_bytes", "rerun_bytes")))
+
+
+def compare(old_path: str, new: dict):
+    with open(old_path, encoding="utf-8") as f:
+        old = {result_key(r): r for r in json.load(f)["results"]}
+    print(f"\nComparació amb {old_path} (ràtio nou/antic; >1 és més lent):")
+    for r in new["results"]:
+        prev = old.get(result_key(r))
+        if not prev:
+            continue
+        for metric in ("median_ms", "css_bytes", "rerun_bytes"):
+            if metric in r and prev.get(metric):
+                ratio = r[metric] / prev[metric]
+                flag = "  <-- regressió" if ratio > 1.2 else ""
+                label = " ".join(f"{k}={v}" for k, v in result_key(r))
+                print(f"  {label:60s} {metric:12s} {prev[metric]:>10} -> {r[metric]:>10}  ×{ratio:.2f}{flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="només les escales menudes")
+    ap.add_argument("--only", default="pool,search,parse,ranking,css")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", help="fitxer JSON (per defecte bench/results/<commit>.json)")
+    ap.add_argument("--compare", help="JSON d'una execució anterior")
+    args = ap.parse_args()
+
+    scales = (1, 10) if args.quick else (1, 10, 100)
+    sizes = (10_000,) if args.quick else (10_000, 100_000, 1_000_000)
+    cases = {
+        "pool": lambda: bench_pool(scales, args.repeat),
+        "search": lambda: bench_search(scales, args.repeat),
+        "parse": lambda: bench_parse(sizes, args.repeat),
+        "ranking": lambda: bench_ranking(sizes, args.repeat),
+        "css": lambda: bench_css(args.repeat),
+    }
+    results = []
+    for name in args.only.split(","):
+        t0 = time.perf_counter()
+        rows = cases[name.strip()]()
+        results += rows
+        print(f"[{name}] {time.perf_counter() - t0:.1f} s")
+        for r in rows:
+            print("   ", json.dumps(r, ensure_ascii=False))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}{'-quick' if args.quick else ''}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\nResultats a {out}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# =========================
+# checker.py — Revisió de textos
+# =========================
+"""Marca en un text lliure tots els monosíl·labs que tenen parella diacrítica.
+
+Una sola passada: totes les formes de `parelles` es compilen en una única
+regex en forma de trie (prefixos comuns factoritzats), que es passa sobre
+el text en minúscules. El motor de `re` fa tot el recorregut en C i Python
+només veu les coincidències. `Checker` és immutable i es pot compartir
+entre sessions.
+"""
+import html
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+TOKEN = re.compile(r"\w+")
+
+Hit = namedtuple("Hit", "start end token forma alternativa")
+
+
+def _trie_pattern(node: dict) -> str:
+    end = "" in node
+    alts = [re.escape(ch) + _trie_pattern(sub) for ch, sub in sorted(node.items()) if ch]
+    if not alts:
+        return ""
+    body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    return f"(?:{body})?" if end else body
+
+
+def compile_forms(words) -> re.Pattern:
+    """Una regex per a totes les paraules, amb límits de paraula Unicode."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile(r"(?<!\w)(?:" + _trie_pattern(trie) + r")(?!\w)")
+
+
+class Checker:
+    def __init__(self, parelles: dict, model=None):
+        self.forms = {w.lower(): alt for w, alt in parelles.items()}
+        self.pattern = compile_forms(self.forms)
+        self.model = model  # `context_model.ContextModel` opcional, per a `suggest`
+
+    def iter_hits(self, text: str):
+        """Genera un `Hit` per cada paraula del text que té parella diacrítica."""
+        forms = self.forms
+        low = text.lower()
+        if len(low) != len(text):
+            # Algun caràcter canvia de llargària en minúscules: paraula a paraula.
+            for m in TOKEN.finditer(text):
+                key = m.group().lower()
+                if key in forms:
+                    yield Hit(m.start(), m.end(), m.group(), key, forms[key])
+            return
+        for m in self.pattern.finditer(low):
+            start, end = m.span()
+            key = m.group()
+            yield Hit(start, end, text[start:end], key, forms[key])
+
+    def check(self, text: str) -> list:
+        return list(self.iter_hits(prepare(text)))
+
+    def suggest(self, text: str, hits, min_prob: float = 0.8) -> dict:
+        """{inici: (forma, probabilitat)} per als hits on el context apunta a l'altra forma.
+
+        Totes les aparicions del text es classifiquen en un sol lot.
+        """
+        if self.model is None or not hits:
+            return {}
+        from context_model import tokenize
+
+        words, at = [], {}
+        for i, (start, _, w) in enumerate(tokenize(text)):
+            words.append(w)
+            at[start] = i
+        todo = [h for h in hits if h.start in at and self.model.knows(h.forma)]
+        out = {}
+        for h, pred in zip(todo, self.model.predict_batch([(words, at[h.start]) for h in todo])):
+            if pred and pred[0] != h.forma and pred[1] >= min_prob:
+                out[h.start] = pred
+        return out
+
+    def summary(self, hits) -> list:
+        """[(forma, vegades)] de més a menys freqüent."""
+        return Counter(h.forma for h in hits).most_common()
+
+
+def prepare(text: str) -> str:
+    """NFC perquè 'é' compost i descompost compten igual."""
+    return unicodedata.normalize("NFC", text or "")
+
+
+def highlight(text: str, hits, limit: int = 5000, suggestions=None) -> str:
+    """HTML amb les paraules marcades (`.accented`), només els primers `limit` caràcters.
+
+    Les que tenen suggeriment de `Checker.suggest` porten a més `.suspect`.
+    """
+    suggestions = suggestions or {}
+    out = []
+    pos = 0
+    for h in hits:
+        if h.end > limit:
+            break
+        out.append(html.escape(text[pos:h.start]))
+        if h.start in suggestions:
+            forma, prob = suggestions[h.start]
+            cls, title = "accented suspect", f"Potser: {forma} ({prob:.0%})"
+        else:
+            cls, title = "accented", h.alternativa
+        out.append(f'<span class="{cls}" title="{html.escape(title)}">'
+                   f'{html.escape(h.token)}</span>')
+        pos = h.end
+    out.append(html.escape(text[pos:limit]))
+    if len(text) > limit:
+        out.append(" […]")
+    return "".join(out).replace("\n", "<br>")
@@ -0,0 +1,196 @@
+# =========================
+# context_model.py — Quina forma toca segons el context
+# =========================
+"""Classificador de context per a les parelles diacrítiques.
+
+Per a cada aparició d'una forma ambigua (p. ex. "mes"/"més") es generen
+trets amb les paraules del voltant (±2 amb posició, i el bigrama que
+l'envolta); la paraula mateixa no compta, perquè pot estar mal accentuada.
+Amb els exemples del corpus s'entrena un Naive Bayes per parella, que
+queda com un model lineal: `bias[parella] + suma(W[parella, trets])`.
+Positiu -> forma amb accent.
+
+La predicció per lots aplana tots els trets en dos vectors d'índexs i
+ho suma amb `numpy.bincount`, sense bucles Python per tret.
+
+Serialització compacta (capçalera JSON + pesos float32) a
+`data/context_model.bin`. Per a reentrenar després d'editar el corpus:
+
+    python context_model.py
+"""
+import json
+import os
+import re
+import struct
+import unicodedata
+
+import numpy as np
+
+from corpus import CORPUS_PATH, DATA_DIR, Corpus, load_pares
+
+MODEL_PATH = os.path.join(DATA_DIR, "context_model.bin")
+
+WORD = re.compile(r"\w+")
+WINDOW = 2
+ALPHA = 0.5  # suavitzat de Laplace
+
+
+def tokenize(text: str) -> list:
+    """Paraules en minúscules (NFC), en ordre; [(inici, fi, paraula)]."""
+    text = unicodedata.normalize("NFC", text or "")
+    return [(m.start(), m.end(), m.group().lower()) for m in WORD.finditer(text)]
+
+
+def features(words: list, i: int) -> list:
+    """Trets de context de `words[i]` (sense la paraula mateixa)."""
+    out = []
+    for d in range(1, WINDOW + 1):
+        out.append(f"L{d}={words[i - d] if i - d >= 0 else '<s>'}")
+        out.append(f"R{d}={words[i + d] if i + d < len(words) else '</s>'}")
+    out.append(f"LR={out[0][3:]}_{out[1][3:]}")
+    return out
+
+
+def corpus_examples(corpus, pares):
+    """(parella, paraules, posició, amb_accent) per a cada aparició als exemples."""
+    forms = {w: (k, w == acc) for k, (acc, plain) in enumerate(pares) for w in (acc, plain)}
+    for word in corpus:
+        for sentence in corpus[word].get("ejemplos", ()):
+            words = [w for _, _, w in tokenize(sentence)]
+            for i, w in enumerate(words):
+                if w in forms:
+                    k, accented = forms[w]
+                    yield k, words, i, accented
+
+
+class ContextModel:
+    def __init__(self, pares, vocab: list, bias, weights, trained=(), corpus_size=None):
+        self.pares = [tuple(p) for p in pares]
+        self.trained = {tuple(p) for p in trained}  # parelles amb exemples de les dues formes
+        self.corpus_size = corpus_size
+        self.vocab = list(vocab)
+        self.index = {f: j for j, f in enumerate(self.vocab)}
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.weights = np.asarray(weights, dtype=np.float32).reshape(len(self.pares), len(self.vocab))
+        self.forms = {w: k for k, p in enumerate(self.pares) for w in p}
+
+    @classmethod
+    def train(cls, examples, pares) -> "ContextModel":
+        """Naive Bayes multinomial per parella; només les parelles amb exemples de les dues formes."""
+        examples = list(examples)
+        vocab = sorted({f for _, words, i, _ in examples for f in features(words, i)})
+        index = {f: j for j, f in enumerate(vocab)}
+        counts = np.zeros((len(pares), 2, len(vocab)), dtype=np.float64)
+        docs = np.zeros((len(pares), 2))
+        for k, words, i, accented in examples:
+            docs[k, int(accented)] += 1
+            for f in features(words, i):
+                counts[k, int(accented), index[f]] += 1
+        trained = (docs > 0).all(axis=1)
+        smoothed = counts + ALPHA
+        logp = np.log(smoothed / smoothed.sum(axis=2, keepdims=True))
+        weights = np.where(trained[:, None], logp[:, 1] - logp[:, 0], 0.0)
+        bias = np.where(trained, np.log(np.maximum(docs[:, 1], 1) / np.maximum(docs[:, 0], 1)), 0.0)
+        return cls(pares, vocab, bias, weights, [p for p, ok in zip(pares, trained) if ok])
+
+    # --- Serialització ---------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({"pares": self.pares, "vocab": self.vocab, "trained": sorted(self.trained),
+                             "corpus_size": self.corpus_size}, ensure_ascii=False).encode("utf-8")
+        return b"".join([struct.pack("<I", len(header)), header,
+                         self.bias.astype("<f4").tobytes(), self.weights.astype("<f4").tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ContextModel":
+        (hlen,) = struct.unpack_from("<I", data)
+        header = json.loads(data[4:4 + hlen])
+        n, v = len(header["pares"]), len(header["vocab"])
+        bias = np.frombuffer(data, dtype="<f4", count=n, offset=4 + hlen)
+        weights = np.frombuffer(data, dtype="<f4", count=n * v, offset=4 + hlen + 4 * n)
+        return cls(header["pares"], header["vocab"], bias, weights, header["trained"], header.get("corpus_size"))
+
+    # --- Predicció ---------------------------------------------------------
+
+    def knows(self, word: str) -> bool:
+        k = self.forms.get(word.lower())
+        return k is not None and self.pares[k] in self.trained
+
+    def predict_batch(self, items) -> list:
+        """[(paraules, posició)] -> [(forma, probabilitat)] o None si no hi ha model per a la parella.
+
+        `paraules` en minúscules, com les dona `tokenize`.
+        """
+        items = list(items)
+        pair_ids, occ, feats, known = [], [], [], []
+        index = self.index
+        for n, (words, i) in enumerate(items):
+            k = self.forms.get(words[i])
+            if k is None or self.pares[k] not in self.trained:
+                continue
+            known.append(n)
+            pair_ids.append(k)
+            row = len(known) - 1
+            for f in features(words, i):
+                j = index.get(f)
+                if j is not None:
+                    occ.append(row)
+                    feats.append(j)
+        out = [None] * len(items)
+        if not known:
+            return out
+        pair_ids = np.asarray(pair_ids, dtype=np.intp)
+        occ = np.asarray(occ, dtype=np.intp)
+        scores = self.bias[pair_ids].astype(np.float64)
+        if len(occ):
+            w = self.weights[pair_ids[occ], np.asarray(feats, dtype=np.intp)]
+            scores += np.bincount(occ, weights=w, minlength=len(known))
+        prob = 1.0 / (1.0 + np.exp(-scores))  # P(amb accent)
+        for row, n in enumerate(known):
+            acc, plain = self.pares[pair_ids[row]]
+            p = float(prob[row])
+            out[n] = (acc, p) if p >= 0.5 else (plain, 1.0 - p)
+        return out
+
+    def predict_sentences(self, sentences) -> list:
+        """Per frase: [(inici, fi, forma escrita, forma predita, probabilitat)]."""
+        items, where = [], []
+        for s, sentence in enumerate(sentences):
+            toks = tokenize(sentence)
+            words = [w for _, _, w in toks]
+            for i, (start, end, w) in enumerate(toks):
+                if w in self.forms:
+                    items.append((words, i))
+                    where.append((s, start, end, w))
+        out = [[] for _ in sentences]
+        for (s, start, end, w), pred in zip(where, self.predict_batch(items)):
+            if pred:
+                out[s].append((start, end, w, pred[0], pred[1]))
+        return out
+
+
+def train_from_corpus(path: str = CORPUS_PATH) -> ContextModel:
+    pares = load_pares()
+    model = ContextModel.train(corpus_examples(Corpus(path), pares), pares)
+    model.corpus_size = os.path.getsize(path)
+    return model
+
+
+def load_model(path: str = MODEL_PATH) -> ContextModel:
+    """El model desat; si falta o no quadra amb el corpus, s'entrena en memòria."""
+    try:
+        with open(path, "rb") as f:
+            model = ContextModel.from_bytes(f.read())
+        if model.corpus_size == os.path.getsize(CORPUS_PATH) and model.pares == load_pares():
+            return model
+    except (FileNotFoundError, ValueError, struct.error):
+        pass
+    return train_from_corpus()
+
+
+if __name__ == "__main__":
+    model = train_from_corpus()
+    data = model.to_bytes()
+    with open(MODEL_PATH, "wb") as f:
+        f.write(data)
+    print(f"{len(model.trained)} parelles, {len(model.vocab)} trets, {len(data)} bytes a {MODEL_PATH}")
@@ -0,0 +1,128 @@
+# =========================
+# corpus.py — Corpus de monosíl·labs
+# =========================
+"""Corpus llegit de `data/`, una vegada per procés i paraula a paraula.
+
+    data/pares.json           parelles (amb accent, sense accent)
+    data/monosilabs.jsonl     una entrada per línia: paraula, categoria,
+                              definicion, ejemplos
+    data/monosilabs.idx.json  índex paraula -> [offset, longitud] en bytes
+
+`Corpus` es comporta com el dict `monosilabos` d'abans (`in`, `[]`, `keys()`,
+`items()`...), però només llig i parseja l'entrada d'una paraula quan algú
+la demana. Si l'índex falta o no quadra amb el fitxer, es refà en memòria.
+El fitxer es llig amb `mmap`: diverses rèpliques a la mateixa màquina
+comparteixen les mateixes pàgines de memòria.
+
+Per a regenerar l'índex després d'editar el corpus:
+    python corpus.py
+"""
+import json
+import mmap
+import os
+import threading
+from collections.abc import Mapping
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+PARES_PATH = os.path.join(DATA_DIR, "pares.json")
+CORPUS_PATH = os.path.join(DATA_DIR, "monosilabs.jsonl")
+
+
+def index_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".idx.json"
+
+
+def build_index(path: str) -> dict:
+    """Una passada pel fitxer: paraula -> [offset, longitud]."""
+    words = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                words[json.loads(line)["paraula"]] = [offset, len(line)]
+            offset += len(line)
+    return {"size": os.path.getsize(path), "words": words}
+
+
+def write_index(path: str) -> dict:
+    idx = build_index(path)
+    with open(index_path(path), "w", encoding="utf-8") as f:
+        json.dump(idx, f, ensure_ascii=False, separators=(",", ":"))
+    return idx
+
+
+def read_index(path: str) -> dict:
+    try:
+        with open(index_path(path), encoding="utf-8") as f:
+            idx = json.load(f)
+        if idx.get("size") == os.path.getsize(path):
+            return idx
+    except (FileNotFoundError, ValueError):
+        pass
+    return build_index(path)
+
+
+def load_pares(path: str = PARES_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [tuple(p) for p in json.load(f)]
+
+
+def build_parelles(pares) -> dict:
+    parelles = {}
+    for acent, sense in pares:
+        parelles[acent] = sense
+        parelles[sense] = acent
+    return parelles
+
+
+class Corpus(Mapping):
+    """Entrades del corpus, llegides sota demanda i compartides (només lectura)."""
+
+    def __init__(self, path: str = CORPUS_PATH):
+        self.path = path
+        self._offsets = read_index(path)["words"]
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._mm = None
+
+    def _map(self):
+        if self._mm is None:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _read(self, word: str) -> dict:
+        offset, length = self._offsets[word]
+        raw = json.loads(self._map()[offset:offset + length])
+        raw.pop("paraula", None)
+        raw["ejemplos"] = tuple(raw.get("ejemplos", ()))
+        return raw
+
+    def __getitem__(self, word: str) -> dict:
+        entry = self._entries.get(word)
+        if entry is None:
+            if word not in self._offsets:
+                raise KeyError(word)
+            with self._lock:
+                entry = self._entries.get(word)
+                if entry is None:
+                    entry = self._entries[word] = self._read(word)
+        return entry
+
+    def __contains__(self, word) -> bool:
+        return word in self._offsets
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def loaded(self) -> int:
+        """Quantes entrades s'han parsejat ja (per a depurar la càrrega mandrosa)."""
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    idx = write_index(CORPUS_PATH)
+    print(f"{len(idx['words'])} paraules indexades a {index_path(CORPUS_PATH)}")
@@ -0,0 +1,100 @@
+# =========================
+# jsonl_stream.py — Lectura de JSONL per trossos
+# =========================
+"""Lectura de fitxers de puntuacions sense carregar-los sencers.
+
+- `iter_lines(chunks)`: talla en línies un flux de trossos de bytes.
+- `b64_chunks(text)`: descodifica base64 (amb salts de línia, com el torna
+  GitHub) a trossos, sense fer mai el `b64decode` del fitxer sencer.
+- `parse_records(lines, stats)`: JSON línia a línia, validat amb
+  `validate_record`. Les línies que no es poden llegir o no passen la
+  validació es compten a `stats` i es salten: una línia corrupta ja no
+  buida tot el rànguing.
+
+Si hi ha `orjson` s'usa per a parsejar; si no, `json` de la biblioteca estàndard.
+"""
+import binascii
+import json
+
+try:
+    import orjson
+except ImportError:  # opcional: només és més ràpid
+    orjson = None
+
+CHUNK = 1 << 16
+MAX_SCORE = 0xFFFF  # les columnes de `ScoreTable` són `array("H")`
+
+loads = orjson.loads if orjson else json.loads
+JSONError = (ValueError, TypeError)  # orjson.JSONDecodeError és un ValueError
+
+
+def iter_lines(chunks):
+    """Línies (bytes, sense el salt) d'un iterable de trossos de bytes."""
+    rest = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def b64_chunks(text, size: int = CHUNK):
+    """Trossos de bytes descodificats d'un text base64, `size` caràcters cada vegada."""
+    if isinstance(text, bytes):
+        text = text.decode("ascii", errors="ignore")
+    carry = ""
+    for pos in range(0, len(text), size):
+        part = carry + "".join(text[pos:pos + size].split())
+        cut = len(part) - len(part) % 4
+        carry = part[cut:]
+        if cut:
+            yield binascii.a2b_base64(part[:cut])
+    if carry:
+        yield binascii.a2b_base64(carry + "=" * (-len(carry) % 4))
+
+
+def _count(value):
+    if type(value) is int:  # el cas normal (i deixa fora `True`/`False`)
+        return value if 0 <= value <= MAX_SCORE else None
+    if isinstance(value, str) and value.strip().isdigit():
+        n = int(value)
+        return n if n <= MAX_SCORE else None
+    return None
+
+
+def validate_record(obj):
+    """(nom, puntuacio, total, data) si el registre té sentit; si no, None."""
+    if not isinstance(obj, dict):
+        return None
+    nom = obj.get("nom", "—")
+    data = obj.get("data") or ""
+    punts = _count(obj.get("puntuacio") or 0)
+    total = _count(obj.get("total") or 0)
+    if not isinstance(nom, str) or not isinstance(data, str) or punts is None or total is None:
+        return None
+    if total and punts > total:
+        return None
+    return nom, punts, total, data
+
+
+def parse_records(lines, stats=None):
+    """Genera (nom, puntuacio, total, data) de línies JSONL; compta les descartades a `stats`."""
+    bad = 0
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                rec = validate_record(loads(line))
+            except JSONError:
+                rec = None
+            if rec is None:
+                bad += 1
+                continue
+            yield rec
+    finally:
+        if stats is not None:
+            stats["bad_lines"] = stats.get("bad_lines", 0) + bad
@@ -0,0 +1,69 @@
+# =========================
+# leaderboard.py — Índex del rànguing
+# =========================
+"""Rànguing precalculat per mida de quiz (5/10/20) sobre una `ScoreTable`.
+
+Cada mida guarda els índexs de fila ja ordenats per (percentatge, data) de
+major a menor. Es construeix una vegada per versió del fitxer de
+puntuacions i després `add()` hi insereix cada fila nova amb `bisect`,
+així que pintar el rànguing només recorre el top-K.
+
+Dins d'una mateixa mida el percentatge només depén dels punts, així que la
+clau és un sol enter: punts i minuts empaquetats (negats per a ordenar de
+major a menor en una llista ascendent).
+"""
+from array import array
+from bisect import bisect_right
+
+from score_table import NO_DATE, ScoreTable
+
+SIZES = (5, 10, 20)
+_MIN_BITS = 41  # (minuts - NO_DATE) < 2**41
+
+
+def to_row(nom: str, num: int, total: int, data: str) -> dict:
+    den = max(1, total)
+    return {"Nom": nom, "Punts": f"{num}/{den}", "%": round(100 * num / den), "Data": data}
+
+
+def row_key(table: ScoreTable, row: int) -> int:
+    return -((table.punts[row] << _MIN_BITS) | (table.minutes[row] - NO_DATE))
+
+
+class Leaderboard:
+    def __init__(self, table: ScoreTable):
+        self.table = table
+        self._keys = {}
+        self._rows = {}
+        by_size = {n: [] for n in SIZES}
+        for row, n in enumerate(table.total):
+            if n in by_size:
+                by_size[n].append(row)
+        for n, rows in by_size.items():
+            # `sort` és estable: amb la mateixa clau es manté l'ordre d'arribada,
+            # igual que fa `bisect_right` en `add()`.
+            keyed = sorted((row_key(table, r), r) for r in rows)
+            self._keys[n] = array("q", (k for k, _ in keyed))
+            self._rows[n] = array("I", (r for _, r in keyed))
+
+    def add(self, row: int):
+        """Insereix una fila ja afegida a `self.table`."""
+        n = self.table.total[row]
+        if n not in self._keys:
+            return
+        k = row_key(self.table, row)
+        i = bisect_right(self._keys[n], k)
+        self._keys[n].insert(i, k)
+        self._rows[n].insert(i, row)
+
+    def count(self, total: int) -> int:
+        return len(self._rows.get(total, ()))
+
+    def top(self, total: int, k=None) -> list:
+        rows = self._rows.get(total, ())
+        return list(rows if k is None else rows[:k])
+
+    def rows(self, total: int, k=None) -> list:
+        t = self.table
+        return [to_row(t.names[t.nom[row]], t.punts[row], t.total[row], t.date(row))
+                for row in self.top(total, k)]
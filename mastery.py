@@ -0,0 +1,181 @@
+# =========================
+# mastery.py — Domini de cada parella per alumne
+# =========================
+"""Quines parelles domina cada alumne, per a triar les preguntes del quiz.
+
+Per alumne (el nom que posa en guardar, o un id de sessió) es guarda un
+`array("B")` amb dos comptadors per parella: encerts i vegades vistes.
+Són 2 bytes per parella, així que milers d'alumnes caben en poca memòria.
+Quan una parella arriba a `CAP` vegades es divideixen tots dos comptadors
+per la meitat: pesa més el que s'ha respost fa poc.
+
+`record` és O(1). Els alumnes tocats es marquen com a bruts i es desen en
+lot (un `executemany` a SQLite) cada `flush_every` respostes o cada
+`flush_interval` segons, i en tancar el procés.
+
+Els alumnes que no s'han tocat en `idle_evict` segons ixen de memòria en
+el pròxim lot (si tornen, es rellegeixen de SQLite). Els ids de sessió
+anònims (`SESSION_PREFIX`) no tornen mai després que la sessió acaba: la
+seua fila s'esborra en `merge()` i, si no s'han fusionat, quan fa
+`session_ttl` segons que no es toquen.
+
+`weights(alumne)` dona la taxa d'error suavitzada de cada parella (un pes
+per parella, en l'ordre de `pares`), que `quiz_engine.generar_preguntas`
+usa amb `group_by_pair` per a triar més preguntes de les parelles fluixes.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from array import array
+
+CAP = 200
+MIN_WEIGHT = 0.05  # fins i tot una parella dominada torna a eixir de tant en tant
+SESSION_PREFIX = "sessio:"
+_SESSION_END = "sessio;"  # la primera clau després de totes les "sessio:…" (rang sobre la clau primària)
+
+
+class MasteryStore:
+    def __init__(self, pares, path=None, flush_every: int = 100, flush_interval: float = 30.0,
+                 idle_evict: float = 3600.0, session_ttl: float = 7 * 86400):
+        self.pares = [tuple(p) for p in pares]
+        self.pair_of = {w: k for k, p in enumerate(self.pares) for w in p}
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.idle_evict = idle_evict
+        self.session_ttl = session_ttl
+        self._users = {}
+        self._touched = {}  # alumne -> `time.monotonic()` de l'últim ús
+        self._dirty = set()
+        self._deleted = set()  # files de sessions ja fusionades, per esborrar al pròxim lot
+        self._pending = 0  # respostes des de l'últim lot
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.stats = {"updates": 0, "flushes": 0, "rows_written": 0, "evicted": 0, "rows_deleted": 0}
+        if path:
+            db = self._connect()
+            try:
+                db.execute("CREATE TABLE IF NOT EXISTS mastery "
+                           "(user TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL DEFAULT 0)")
+                if "updated" not in {row[1] for row in db.execute("PRAGMA table_info(mastery)")}:
+                    db.execute("ALTER TABLE mastery ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+            finally:
+                db.close()
+            atexit.register(self.flush)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _counts(self, user: str) -> array:
+        self._touched[user] = time.monotonic()
+        counts = self._users.get(user)
+        if counts is None:
+            counts = array("B", bytes(2 * len(self.pares)))
+            if self.path:
+                db = self._connect()
+                try:
+                    row = db.execute("SELECT data FROM mastery WHERE user = ?", (user,)).fetchone()
+                finally:
+                    db.close()
+                if row and len(row[0]) == len(counts):
+                    counts = array("B", row[0])
+            self._users[user] = counts
+        return counts
+
+    def record(self, user: str, word: str, correct: bool):
+        """Una resposta de `user` a una pregunta sobre `word` (qualsevol de les dues formes)."""
+        k = self.pair_of.get(word)
+        if k is None:
+            return
+        with self._lock:
+            counts = self._counts(user)
+            if counts[2 * k + 1] >= CAP:
+                counts[2 * k] //= 2
+                counts[2 * k + 1] //= 2
+            counts[2 * k] += bool(correct)
+            counts[2 * k + 1] += 1
+            self._dirty.add(user)
+            self.stats["updates"] += 1
+            self._pending += 1
+            due = (self._pending >= self.flush_every
+                   or time.monotonic() - self._last_flush > self.flush_interval)
+        if due:
+            self.flush()
+
+    def record_quiz(self, user: str, quiz: dict):
+        for q, r in zip(quiz["preguntas"], quiz["respuestas"]):
+            if r:
+                self.record(user, q["correcta"], r == q["correcta"])
+
+    def merge(self, src: str, dst: str):
+        """Passa el que s'ha fet amb l'id de sessió al nom que l'alumne acaba d'escriure."""
+        if src == dst:
+            return
+        with self._lock:
+            a, b = self._counts(src), self._counts(dst)
+            for i in range(0, len(a), 2):
+                correct, seen = a[i] + b[i], a[i + 1] + b[i + 1]
+                while seen > CAP:
+                    correct, seen = correct // 2, seen // 2
+                b[i], b[i + 1] = correct, seen
+            # L'id de sessió no es torna a usar: fora de memòria i, si ja s'havia desat, de SQLite.
+            del self._users[src]
+            self._touched.pop(src, None)
+            self._dirty.discard(src)
+            self._deleted.add(src)
+            self._dirty.add(dst)
+
+    def weights(self, user: str) -> list:
+        """Per parella: (errors + 1) / (vistes + 2); 0,5 si encara no l'ha vista."""
+        with self._lock:
+            counts = self._counts(user)
+            return [max(MIN_WEIGHT, (counts[i + 1] - counts[i] + 1) / (counts[i + 1] + 2))
+                    for i in range(0, len(counts), 2)]
+
+    def flush(self):
+        """Desa en un sol lot tots els alumnes que han canviat i trau de memòria els inactius."""
+        now = time.time()
+        with self._lock:
+            batch = [(u, self._users[u].tobytes(), now) for u in self._dirty]
+            deleted = [(u,) for u in self._deleted]
+            self._dirty.clear()
+            self._deleted.clear()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        if self.path and (batch or deleted):
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany("INSERT INTO mastery (user, data, updated) VALUES (?, ?, ?) "
+                                   "ON CONFLICT(user) DO UPDATE SET data = excluded.data, "
+                                   "updated = excluded.updated", batch)
+                    db.executemany("DELETE FROM mastery WHERE user = ?", deleted)
+                    cur = db.execute("DELETE FROM mastery WHERE user >= ? AND user < ? AND updated < ?",
+                                     (SESSION_PREFIX, _SESSION_END, now - self.session_ttl))
+            except sqlite3.Error:
+                with self._lock:
+                    self._dirty.update(u for u, _, _ in batch if u in self._users)  # es tornarà a provar
+                    self._deleted.update(u for u, in deleted)
+                raise
+            finally:
+                db.close()
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(batch)
+            self.stats["rows_deleted"] += len(deleted) + max(0, cur.rowcount)
+        self._evict_idle()
+
+    def _evict_idle(self):
+        """Fora de memòria els alumnes ja desats que fa `idle_evict` segons que no es toquen."""
+        limit = time.monotonic() - self.idle_evict
+        with self._lock:
+            idle = [u for u, t in self._touched.items() if t < limit and u not in self._dirty]
+            if not self.path:
+                # Sense SQLite no hi ha on rellegir-los: només se'n van les sessions anònimes.
+                idle = [u for u in idle if u.startswith(SESSION_PREFIX)]
+            for u in idle:
+                self._users.pop(u, None)
+                del self._touched[u]
+            self.stats["evicted"] += len(idle)
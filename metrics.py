@@ -0,0 +1,233 @@
+# =========================
+# metrics.py — Temps i comptadors per procés
+# =========================
+"""Instrumentació lleugera: on se'n va el temps d'un rerun.
+
+    with metrics.span("view", view=opcio):
+        ...
+    metrics.inc("cache_total", cache="scores", result="hit")
+    metrics.observe("github_request_seconds", 0.12, endpoint="trees")
+
+Cada sèrie (nom + etiquetes) és un histograma amb cubetes fixes, agregat
+per procés. `render()` ho torna en format de text de Prometheus; amb
+`enable(path=...)` s'escriu en un fitxer (per al textfile collector de
+node_exporter) i amb `serve(port)` s'exposa a `http://127.0.0.1:<port>/metrics`.
+
+Desactivat (per defecte), `span()` torna sempre el mateix objecte buit i
+`inc`/`observe` ixen a la primera línia: no es mesura ni es guarda res.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+PREFIX = "monosilabs_"
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ENABLED = False
+_lock = threading.Lock()
+_histograms = {}  # (nom, etiquetes) -> [comptes per cubeta..., +Inf], suma, nombre
+_counters = {}    # (nom, etiquetes) -> valor
+_path = None
+_interval = 15.0
+_last_write = 0.0
+
+
+def enable(path=None, interval: float = 15.0):
+    """Activa la instrumentació; amb `path`, escriu el text de Prometheus com a molt cada `interval` s."""
+    global ENABLED, _path, _interval
+    _path, _interval = path, interval
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# -------------------------
+# Registre
+# -------------------------
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        h[0][bisect_left(BUCKETS, seconds)] += 1
+        h[1] += seconds
+        h[2] += 1
+    _maybe_write()
+
+
+def inc(name: str, n: int = 1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+class _Span:
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.t0 = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stop(self):
+        observe(self.name + "_seconds", time.perf_counter() - self.t0, **self.labels)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def stop(self):
+        pass
+
+
+_NOOP = _NoSpan()
+
+
+def span(name: str, **labels):
+    """Context manager que mesura el bloc en l'histograma `<name>_seconds`."""
+    return _Span(name, labels) if ENABLED else _NOOP
+
+
+start = span  # `t = metrics.start("rerun")` ... `t.stop()` quan no cap en un `with`
+
+
+# -------------------------
+# Lectura i exportació
+# -------------------------
+def _quantile(counts, total, q):
+    """Quantil aproximat (límit superior de la cubeta), com `histogram_quantile`."""
+    target = q * total
+    acc = 0
+    for bound, c in zip(BUCKETS + (float("inf"),), counts):
+        acc += c
+        if acc >= target:
+            return bound
+    return float("inf")
+
+
+def snapshot() -> list:
+    """Files per al panell de depuració, de més a menys temps total."""
+    with _lock:
+        hist = [(k, list(h[0]), h[1], h[2]) for k, h in _histograms.items()]
+        counters = list(_counters.items())
+    rows = []
+    for (name, labels), counts, total, n in hist:
+        rows.append({
+            "mètrica": name, "etiquetes": ", ".join(f"{k}={v}" for k, v in labels), "n": n,
+            "total ms": round(total * 1000, 1), "mitjana ms": round(total * 1000 / max(1, n), 2),
+            "p50 ≤ ms": _quantile(counts, n, 0.5) * 1000, "p95 ≤ ms": _quantile(counts, n, 0.95) * 1000,
+        })
+    rows.sort(key=lambda r: -r["total ms"])
+    for (name, labels), value in sorted(counters):
+        rows.append({"mètrica": name, "etiquetes": ", ".join(f"{k}={v}" for k, v in labels), "n": value})
+    return rows
+
+
+def _labels(labels, extra=()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in items)
+    return "{" + body + "}"
+
+
+def render() -> str:
+    """Totes les sèries en format de text de Prometheus."""
+    with _lock:
+        hist = sorted((k, list(h[0]), h[1], h[2]) for k, h in _histograms.items())
+        counters = sorted(_counters.items())
+    lines, typed = [], set()
+    for (name, labels), counts, total, n in hist:
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        acc = 0
+        for bound, c in zip(BUCKETS + (float("inf"),), counts):
+            acc += c
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{metric}_bucket{_labels(labels, [('le', le)])} {acc}")
+        lines.append(f"{metric}_sum{_labels(labels)} {total}")
+        lines.append(f"{metric}_count{_labels(labels)} {n}")
+    for (name, labels), value in counters:
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path=None):
+    path = path or _path
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def _maybe_write():
+    global _last_write
+    if _path and time.monotonic() - _last_write > _interval:
+        _last_write = time.monotonic()
+        try:
+            write()
+        except OSError:
+            pass
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+    """Servidor mínim amb `GET /metrics` en un fil. Torna el servidor."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
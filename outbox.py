@@ -0,0 +1,132 @@
+# =========================
+# outbox.py — Guardat en segon pla
+# =========================
+"""Bústia d'eixida durable per a les puntuacions.
+
+`Outbox.put(record)` només escriu el registre en un fitxer del directori
+de la bústia (escriptura atòmica, uns pocs bytes) i torna de seguida amb
+un identificador. Un fil en segon pla buida la bústia a través de la
+`WriteQueue` (un sol commit per a tot el que hi haja) i esborra els
+fitxers quan el backend confirma. Si GitHub no respon, els fitxers es
+queden al disc i es reintenta amb backoff; si el procés es reinicia, el
+fil nou envia el que haja quedat pendent.
+
+L'entrega és "almenys una vegada": si el procés mor just entre el commit
+i l'esborrat, el registre es tornarà a enviar.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from scores_store import ConflictError, WriteQueue
+
+try:
+    import fcntl
+except ImportError:  # Windows: només un procés per bústia
+    fcntl = None
+
+KEEP_WRITTEN = 10000  # ids enviats que es recorden per a `status`
+PENDING = "pending"
+WRITTEN = "written"
+
+
+class Outbox:
+    def __init__(self, queue: WriteQueue, root: str, on_written=None,
+                 retry_delay: float = 2.0, max_delay: float = 120.0):
+        self.queue = queue
+        self.root = root
+        self.on_written = on_written  # callback(records, versió) després de cada enviament
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self._wake = threading.Event()
+        self._written = {}  # id -> versió (només les d'aquest procés)
+        self.last_error = None
+        self.metrics = {"queued": 0, "flushes": 0, "sent": 0, "errors": 0}
+        os.makedirs(root, exist_ok=True)
+        self._wake.set()  # el que haja quedat d'una execució anterior
+        threading.Thread(target=self._run, name="scores-outbox", daemon=True).start()
+
+    def put(self, record: dict) -> str:
+        """Deixa el registre a la bústia i torna el seu id, sense esperar la xarxa."""
+        rid = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.root, rid + ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self.metrics["queued"] += 1
+        self._wake.set()
+        return rid
+
+    def status(self, rid: str) -> str:
+        return WRITTEN if rid in self._written else PENDING
+
+    def pending(self) -> int:
+        return len(self._files())
+
+    def _files(self) -> list:
+        return sorted(n for n in os.listdir(self.root) if n.endswith(".json"))
+
+    def _read(self, names: list):
+        rids, records = [], []
+        for name in names:
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue  # ja enviat per un altre procés, o fitxer truncat
+            rids.append(name[:-len(".json")])
+        return rids, records
+
+    def flush(self) -> int:
+        """Envia tot el que hi ha a la bústia. Torna quants registres ha enviat."""
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            rids, records = self._read(self._files())
+            if not records:
+                return 0
+            self.metrics["flushes"] += 1
+            try:
+                version = self.queue.submit_many(records)
+            except ConflictError as e:
+                # Els shards que sí que s'han escrit no s'han de tornar a enviar.
+                if e.pending:
+                    left = {id(r) for r in e.pending}
+                    self._done([(rid, r) for rid, r in zip(rids, records) if id(r) not in left], None)
+                raise
+            self._done(list(zip(rids, records)), version)
+        return len(records)
+
+    def _done(self, sent: list, version):
+        for rid, _ in sent:
+            self._written[rid] = version
+            if len(self._written) > KEEP_WRITTEN:
+                del self._written[next(iter(self._written))]
+            try:
+                os.remove(os.path.join(self.root, rid + ".json"))
+            except FileNotFoundError:
+                pass
+        self.metrics["sent"] += len(sent)
+        if sent and version is not None and self.on_written:
+            self.on_written([r for _, r in sent], version)
+
+    def _run(self):
+        delay = self.retry_delay
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+                self.last_error = None
+                delay = self.retry_delay
+            except Exception as e:
+                self.metrics["errors"] += 1
+                self.last_error = e
+                # Encara no s'ha pogut: es reintenta sol, amb esperes cada vegada més llargues.
+                time.sleep(delay)
+                delay = min(self.max_delay, delay * 2)
+                self._wake.set()
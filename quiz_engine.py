@@ -0,0 +1,363 @@
+# =========================
+# quiz_engine.py — Generació i correcció de quizzes
+# =========================
+"""Motor del quiz, sense Streamlit: es pot importar o usar des de la línia d'ordres.
+
+`build_pool` recorre el corpus una sola vegada i guarda totes les preguntes
+possibles (paraula, frase, frase amb buit, parella) en una tupla immutable.
+Generar un quiz és només triar índexs a l'atzar.
+
+Ús:
+    python quiz_engine.py generate --count 30 --n 10 --seed 7 --out quizzes.jsonl
+    python quiz_engine.py grade --quizzes quizzes.jsonl --answers fulls.csv --out notes.jsonl
+
+Fulls de respostes (JSONL o CSV):
+    {"nom": "Anna", "quiz": 3, "respuestas": ["més", "te", ...]}
+    nom,quiz,respuestas          (CSV: respostes separades per "|")
+    Anna,3,més|te|...
+
+La correcció torna registres amb el mateix format que el rànguing
+(`nom`, `puntuacio`, `total`, `data`). Els fulls dolents (JSON trencat,
+`quiz` que no és un número o no existeix, `respuestas` que no és una
+llista) se salten i es compten; `grade` diu quantes línies i quines.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+Item = namedtuple("Item", "paraula frase enunciado pareja")
+
+
+def make_cloze(sentence: str, word: str) -> str:
+    return re.sub(rf"\b{re.escape(word)}\b", "_____", sentence, count=1)
+
+
+def build_pool(monosilabos, parelles) -> tuple:
+    pool = []
+    for w, info in monosilabos.items():
+        if w in parelles and parelles[w] in monosilabos:
+            pat = re.compile(rf"\b{re.escape(w)}\b")
+            for ex in info["ejemplos"]:
+                if pat.search(ex):
+                    pool.append(Item(w, ex, pat.sub("_____", ex, count=1), parelles[w]))
+    return tuple(pool)
+
+
+class AliasTable:
+    """Mostreig ponderat en O(1) per extracció (mètode d'àlies de Vose).
+
+    Construir-la és O(n); cada `sample` és un `random()` i una comparació.
+    """
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("Cal almenys un pes positiu.")
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def sample(self, rng=random) -> int:
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+
+def weighted_indices(weights, k: int, rng=random) -> list:
+    """`k` índexs diferents, cadascun amb probabilitat proporcional al seu pes.
+
+    Alias + rebuig dels repetits; si el rebuig s'allarga (pocs ítems amb molt
+    de pes), la resta s'ompli a l'atzar amb els que queden.
+    """
+    k = min(k, len(weights))
+    table = AliasTable(weights)
+    chosen, seen = [], set()
+    for _ in range(20 * k):
+        if len(chosen) == k:
+            break
+        i = table.sample(rng)
+        if i not in seen:
+            seen.add(i)
+            chosen.append(i)
+    if len(chosen) < k:
+        rest = [i for i in range(len(weights)) if i not in seen]
+        chosen += rng.sample(rest, k=k - len(chosen))
+    return chosen
+
+
+def group_by_pair(pool: tuple, pares) -> tuple:
+    """Per a cada parella de `pares` (en el mateix ordre), els índexs dels seus ítems del pool.
+
+    Es calcula una vegada per pool; després triar per parella ja no depén de la mida del pool.
+    """
+    pair_of = {w: k for k, p in enumerate(pares) for w in p}
+    groups = [[] for _ in pares]
+    for i, item in enumerate(pool):
+        k = pair_of.get(item.paraula)
+        if k is not None:
+            groups[k].append(i)
+    return tuple(tuple(g) for g in groups)
+
+
+def weighted_pair_indices(weights, groups, k: int, rng=random) -> list:
+    """`k` ítems diferents: parella amb l'alias (pes × ítems de la parella) i ítem a l'atzar dins.
+
+    És la mateixa distribució que donar a cada ítem el pes de la seua parella,
+    però la taula només té una entrada per parella (unes 15), no una per ítem.
+    """
+    size = sum(len(g) for g in groups)
+    k = min(k, size)
+    table = AliasTable([w * len(g) for w, g in zip(weights, groups)])
+    chosen, seen = [], set()
+    for _ in range(20 * k):
+        if len(chosen) == k:
+            break
+        group = groups[table.sample(rng)]
+        i = group[int(rng.random() * len(group))]
+        if i not in seen:
+            seen.add(i)
+            chosen.append(i)
+    if len(chosen) < k:
+        rest = [i for g in groups for i in g if i not in seen]
+        chosen += rng.sample(rest, k=k - len(chosen))
+    return chosen
+
+
+def generar_preguntas(pool: tuple, n=10, rng=random, weights=None, groups=None):
+    """Preguntes a l'atzar, ponderades si hi ha `weights`.
+
+    Amb `groups` (de `group_by_pair`), `weights` és un pes per parella; sense,
+    un pes per ítem del pool.
+    """
+    preguntas = []
+    if weights is None:
+        indices = rng.sample(range(len(pool)), k=min(n, len(pool)))
+    elif groups is not None:
+        indices = weighted_pair_indices(weights, groups, n, rng)
+    else:
+        indices = weighted_indices(weights, n, rng)
+    for i in indices:
+        item = pool[i]
+        preguntas.append({
+            "enunciado": item.enunciado,
+            "correcta": item.paraula,
+            "opciones": rng.sample([item.paraula, item.pareja], k=2),
+            "pareja": item.pareja,
+        })
+    return preguntas
+
+
+def generar_quiz(pool: tuple, n=10, rng=random, weights=None, groups=None):
+    preguntas = generar_preguntas(pool, n, rng, weights, groups)
+    return {"preguntas": preguntas, "respuestas": [None]*len(preguntas)}
+
+
+def corregir(quiz: dict) -> int:
+    """Nombre de respostes encertades."""
+    return sum(r == q["correcta"] for r, q in zip(quiz["respuestas"], quiz["preguntas"]) if r)
+
+
+def score_record(nom: str, puntuacio: int, total: int, data=None) -> dict:
+    return {
+        "nom": nom,
+        "puntuacio": puntuacio,
+        "total": total,
+        "data": data or datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+# -------------------------
+# Lots (CLI)
+# -------------------------
+GRADE_CHUNK = 5000
+POOL_THRESHOLD = 20000  # per davall d'açò, un procés va més ràpid que repartir
+MAX_REPORTED = 20  # línies dolentes que es guarden per a l'informe
+
+
+def generate_batch(pool: tuple, count: int, n: int, seed: int) -> list:
+    """`count` quizzes reproduïbles: el quiz `i` sempre ix igual amb la mateixa llavor."""
+    quizzes = []
+    for i in range(count):
+        rng = random.Random(f"{seed}-{i}")
+        quizzes.append({"id": i, "seed": seed, "preguntas": generar_preguntas(pool, n, rng)})
+    return quizzes
+
+
+def _bad_sheet(stats, line: int, reason: str):
+    if stats is None:
+        return
+    stats["bad_sheets"] = stats.get("bad_sheets", 0) + 1
+    bad = stats.setdefault("bad_lines", [])
+    if len(bad) < MAX_REPORTED:
+        bad.append((line, reason))
+
+
+def _parse_sheets(path: str):
+    """(línia, full o None, motiu) per a cada línia no buida."""
+    import csv  # només per a la correcció en lot; l'app no el necessita
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    quiz = int(row.get("quiz") or "")
+                except ValueError:
+                    yield reader.line_num, None, f"quiz no vàlid: {row.get('quiz')!r}"
+                    continue
+                resp = row.get("respuestas") or ""
+                yield reader.line_num, {"nom": row.get("nom") or "", "quiz": quiz,
+                                        "respuestas": resp.split("|") if resp else []}, None
+        else:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    sheet = json.loads(line)
+                except ValueError:
+                    yield n, None, "JSON invàlid"
+                    continue
+                if not isinstance(sheet, dict):
+                    yield n, None, "no és un objecte"
+                elif not isinstance(sheet.get("quiz"), int) or isinstance(sheet.get("quiz"), bool):
+                    yield n, None, f"quiz no vàlid: {sheet.get('quiz')!r}"
+                elif not isinstance(sheet.get("respuestas", []), list):
+                    yield n, None, "respuestas no és una llista"
+                else:
+                    yield n, sheet, None
+
+
+def read_sheets(path: str, keys=None, stats=None):
+    """Fulls de respostes d'un JSONL o un CSV, un a un.
+
+    Els dolents (i, amb `keys`, els d'un quiz que no existeix) se salten i
+    es compten a `stats["bad_sheets"]`, amb les primeres línies a `stats["bad_lines"]`.
+    """
+    for line, sheet, reason in _parse_sheets(path):
+        if sheet is not None and keys is not None and sheet.get("quiz") not in keys:
+            sheet, reason = None, f"quiz desconegut: {sheet.get('quiz')!r}"
+        if sheet is None:
+            _bad_sheet(stats, line, reason)
+        else:
+            yield sheet
+
+
+def grade_sheets(keys: dict, sheets, data=None) -> list:
+    """Corregeix fulls contra `keys` (id del quiz -> respostes correctes)."""
+    data = data or datetime.now().strftime("%Y-%m-%d %H:%M")
+    out = []
+    for sheet in sheets:
+        key = keys[sheet["quiz"]]
+        resp = sheet.get("respuestas") or []
+        correctes = sum(1 for r, c in zip(resp, key) if r and r == c)
+        out.append(score_record(sheet.get("nom", ""), correctes, len(key), data))
+    return out
+
+
+_worker_keys = None
+
+
+def _init_worker(keys):
+    global _worker_keys
+    _worker_keys = keys
+
+
+def _grade_chunk(args):
+    sheets, data = args
+    return grade_sheets(_worker_keys, sheets, data)
+
+
+def _chunks(it, size):
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grade_file(quizzes: list, sheets_path: str, workers=None, data=None, stats=None):
+    """Genera els resultats en ordre; amb molts fulls reparteix per processos.
+
+    Els fulls es validen ací, abans de repartir-los: un full dolent es
+    compta a `stats` i no arriba mai als processos.
+    """
+    keys = {q["id"]: [p["correcta"] for p in q["preguntas"]] for q in quizzes}
+    data = data or datetime.now().strftime("%Y-%m-%d %H:%M")
+    sheets = read_sheets(sheets_path, keys, stats)
+    if workers == 1 or (workers is None and os.path.getsize(sheets_path) < POOL_THRESHOLD * 60):
+        yield from grade_sheets(keys, sheets, data)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(keys,)) as ex:
+        for results in ex.map(_grade_chunk, ((c, data) for c in _chunks(sheets, GRADE_CHUNK))):
+            yield from results
+
+
+def _write_jsonl(path: str, records):
+    f = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    try:
+        n = 0
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            n += 1
+        return n
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def _read_jsonl(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Genera i corregeix quizzes de monosíl·labs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("generate", help="genera quizzes reproduïbles")
+    g.add_argument("--count", type=int, default=1)
+    g.add_argument("--n", type=int, default=10, choices=[5, 10, 20])
+    g.add_argument("--seed", type=int, default=0)
+    g.add_argument("--out", default="-")
+
+    c = sub.add_parser("grade", help="corregeix fulls de respostes (JSONL o CSV)")
+    c.add_argument("--quizzes", required=True)
+    c.add_argument("--answers", required=True)
+    c.add_argument("--out", default="-")
+    c.add_argument("--workers", type=int, default=None,
+                   help="processos (per defecte: automàtic segons la mida)")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "generate":
+        from corpus import Corpus, build_parelles, load_pares
+        pool = build_pool(Corpus(), build_parelles(load_pares()))
+        n = _write_jsonl(args.out, generate_batch(pool, args.count, args.n, args.seed))
+    else:
+        stats = {}
+        n = _write_jsonl(args.out, grade_file(_read_jsonl(args.quizzes), args.answers, args.workers,
+                                              stats=stats))
+        if stats.get("bad_sheets"):
+            print(f"{stats['bad_sheets']} fulls descartats:", file=sys.stderr)
+            for line, reason in stats["bad_lines"]:
+                print(f"  línia {line}: {reason}", file=sys.stderr)
+    print(f"{n} registres escrits.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# =========================
+# score_table.py — Puntuacions en columnes
+# =========================
+"""Taula de puntuacions compacta, per columnes.
+
+En lloc d'una llista de dicts (`nom`, `puntuacio`, `total`, `data`) es
+guarda una columna per camp:
+
+    nom      -> `array("I")` d'índexs a `names` (cada nom una sola vegada)
+    punts    -> `array("H")`
+    total    -> `array("H")`
+    minutes  -> `array("q")` minuts des de 1970 (`NO_DATE` si no hi ha data)
+
+Són buffers contigus: `numpy.frombuffer(t.punts, dtype="u2")` els llig
+sense copiar si algun dia cal vectoritzar.
+"""
+import json
+import struct
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from jsonl_stream import parse_records
+
+DATE_FMT = "%Y-%m-%d %H:%M"
+NO_DATE = -(10 ** 12)  # com `datetime.min`: les dates invàlides van al final
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=65536)
+def _parse_minutes(s) -> int:
+    try:
+        return int((datetime.strptime(s or "", DATE_FMT) - _EPOCH).total_seconds()) // 60
+    except Exception:
+        return NO_DATE
+
+
+@lru_cache(maxsize=16384)
+def _day_minutes(day: str) -> int:
+    return _parse_minutes(day + " 00:00")
+
+
+def date_minutes(s) -> int:
+    """Data 'AAAA-MM-DD HH:MM' -> minuts des de 1970.
+
+    Amb el format exacte només es parseja (i es memoritza) el dia; l'hora es
+    suma a mà. Qualsevol altra cosa passa per `strptime`.
+    """
+    if s and len(s) == 16 and s[10] == " " and s[13] == ":" and s[11:13].isdigit() and s[14:].isdigit():
+        h, m = int(s[11:13]), int(s[14:])
+        day = _day_minutes(s[:10])
+        if h < 24 and m < 60 and day != NO_DATE:
+            return day + h * 60 + m
+    return _parse_minutes(s)
+
+
+def format_minutes(m: int) -> str:
+    return (_EPOCH + timedelta(minutes=m)).strftime(DATE_FMT)
+
+
+class ScoreTable:
+    def __init__(self):
+        self._name_ids = {}
+        self.names = []
+        self.nom = array("I")
+        self.punts = array("H")
+        self.total = array("H")
+        self.minutes = array("q")
+        self._raw_dates = {}  # fila -> text original quan no és una data vàlida
+        self.rejected = 0     # línies JSONL descartades en llegir
+
+    def __len__(self):
+        return len(self.punts)
+
+    def _name_id(self, nom: str) -> int:
+        i = self._name_ids.get(nom)
+        if i is None:
+            i = self._name_ids[nom] = len(self.names)
+            self.names.append(nom)
+        return i
+
+    def append(self, nom: str, puntuacio: int, total: int, data: str) -> int:
+        """Afig una fila i en torna l'índex."""
+        row = len(self.punts)
+        self.nom.append(self._name_id(nom))
+        self.punts.append(max(0, int(puntuacio)))
+        self.total.append(max(0, int(total)))
+        m = date_minutes(data)
+        self.minutes.append(m)
+        if m == NO_DATE and data:
+            self._raw_dates[row] = data
+        return row
+
+    def append_record(self, r: dict) -> int:
+        return self.append(r.get("nom", "—"), r.get("puntuacio") or 0,
+                           r.get("total") or 0, r.get("data") or "")
+
+    def extend_jsonl(self, lines):
+        """Llig línies JSONL (text o bytes) directament a les columnes.
+
+        Les línies corruptes o que no passen `validate_record` se salten i es
+        compten a `rejected`.
+        """
+        stats = {}
+        append = self.append
+        for nom, punts, total, data in parse_records(lines, stats):
+            append(nom, punts, total, data)
+        self.rejected += stats["bad_lines"]
+        return self
+
+    def extend_table(self, other: "ScoreTable"):
+        remap = [self._name_id(n) for n in other.names]
+        base = len(self)
+        self.nom.extend(remap[i] for i in other.nom)
+        self.punts.extend(other.punts)
+        self.total.extend(other.total)
+        self.minutes.extend(other.minutes)
+        for row, raw in other._raw_dates.items():
+            self._raw_dates[base + row] = raw
+        self.rejected += other.rejected
+        return self
+
+    def copy(self) -> "ScoreTable":
+        """Còpia independent, amb els mateixos números de fila."""
+        return ScoreTable().extend_table(self)
+
+    @classmethod
+    def from_records(cls, records) -> "ScoreTable":
+        t = cls()
+        for r in records:
+            t.append_record(r)
+        return t
+
+    @classmethod
+    def concat(cls, tables) -> "ScoreTable":
+        t = cls()
+        for other in tables:
+            t.extend_table(other)
+        return t
+
+    def date(self, row: int) -> str:
+        m = self.minutes[row]
+        return self._raw_dates.get(row, "") if m == NO_DATE else format_minutes(m)
+
+    def record(self, row: int) -> dict:
+        return {
+            "nom": self.names[self.nom[row]],
+            "puntuacio": self.punts[row],
+            "total": self.total[row],
+            "data": self.date(row),
+        }
+
+    def records(self):
+        return (self.record(i) for i in range(len(self)))
+
+    def to_bytes(self) -> bytes:
+        """Serialització compacta (capçalera JSON + buffers de les columnes)."""
+        header = json.dumps({
+            "n": len(self), "names": self.names,
+            "raw": {str(k): v for k, v in self._raw_dates.items()},
+            "rejected": self.rejected,
+        }, ensure_ascii=False).encode("utf-8")
+        return b"".join([struct.pack("<I", len(header)), header, self.nom.tobytes(),
+                         self.punts.tobytes(), self.total.tobytes(), self.minutes.tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ScoreTable":
+        (hlen,) = struct.unpack_from("<I", data)
+        header = json.loads(data[4:4 + hlen])
+        t = cls()
+        t.names = header["names"]
+        t._name_ids = {nom: i for i, nom in enumerate(t.names)}
+        t._raw_dates = {int(k): v for k, v in header["raw"].items()}
+        t.rejected = header.get("rejected", 0)
+        pos = 4 + hlen
+        n = header["n"]
+        for col in (t.nom, t.punts, t.total, t.minutes):
+            size = n * col.itemsize
+            col.frombytes(data[pos:pos + size])
+            pos += size
+        return t
+
+    def counts_by_total(self) -> dict:
+        counts = {}
+        for n in self.total:
+            counts[n] = counts.get(n, 0) + 1
+        return counts
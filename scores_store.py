@@ -0,0 +1,789 @@
+# =========================
+# scores_store.py — Backends del rànguing
+# =========================
+"""Emmagatzematge append-only del rànguing, repartit en shards.
+
+Cada puntuació va a un shard xicotet segons la mida del quiz i el dia:
+
+    <arrel>/<total>/<AAAA-MM-DD>.jsonl
+
+Així guardar una puntuació només escriu el registre nou i el cost no creix
+amb la història del rànguing. A GitHub cada commit afig un tros
+`<total>/<AAAA-MM-DD>.<segell>.jsonl` amb només els registres nous; els
+trossos dels dies tancats es fusionen després en el shard del dia.
+
+També hi ha un backend SQLite local (`SQLiteStore`) que respon el rànguing
+amb una consulta indexada. Per a importar-hi un JSONL existent:
+
+    python scores_store.py import-sqlite scores.jsonl --db scores.sqlite
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import metrics
+from jsonl_stream import CHUNK, b64_chunks, iter_lines, parse_records
+from leaderboard import to_row
+from score_table import ScoreTable, date_minutes
+
+try:
+    import fcntl
+except ImportError:  # Windows: només bloqueig dins del procés
+    fcntl = None
+
+
+MANIFEST = "manifest.json"
+
+
+class ConflictError(Exception):
+    """Algú altre ha escrit el mateix shard abans que nosaltres (409/422).
+
+    `pending` són els registres que encara no s'han escrit (els shards
+    anteriors del mateix lot ja estan guardats i no s'han de repetir).
+    """
+
+    def __init__(self, message: str = "", pending=None):
+        super().__init__(message)
+        self.pending = list(pending or [])
+
+
+def shard_path(record: dict) -> str:
+    """Ruta relativa del shard on va un registre: `<total>/<dia>.jsonl`."""
+    total = int(record.get("total") or 0)
+    dia = (record.get("data") or "")[:10] or "sense-data"
+    return f"{total}/{dia}.jsonl"
+
+
+# Tros escrit per un sol commit: `<total>/<dia>.<segell hex>.jsonl`
+PIECE = re.compile(r"^(\d+)/([^/.]+)\.[0-9a-f]+\.jsonl$")
+
+
+def git_blob_sha(data: bytes) -> str:
+    """El sha que Git (i GitHub) donarà al blob amb aquest contingut."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def dump_record(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def group_by_shard(records) -> dict:
+    groups = {}
+    for rec in records:
+        groups.setdefault(shard_path(rec), []).append(rec)
+    return groups
+
+
+# -------------------------
+# Client HTTP compartit
+# -------------------------
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session(pool_size: int = 16, retries: int = 3) -> "requests.Session":
+    """`requests.Session` amb keep-alive i un pool de `pool_size` connexions per host.
+
+    Només es reintenten sols els GET (errors de connexió, 429 i 5xx, respectant
+    `Retry-After`); els PUT no, perquè els conflictes ja els gestiona la `WriteQueue`.
+    """
+    # `requests` (i `urllib3`) només es carreguen si algú parla amb GitHub:
+    # els backends local i SQLite no els necessiten.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=0.3,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+                  respect_retry_after_header=True, raise_on_status=False)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_observe_response)
+    return session
+
+
+def _endpoint(url: str) -> str:
+    """Categoria de l'URL per a les mètriques (sense shas ni camins, que no tenen fi)."""
+    parts = url.split("?", 1)[0].split("/repos/", 1)[-1].split("/")
+    if len(parts) > 3 and parts[2] == "git":
+        return f"git/{parts[3]}"
+    return parts[2] if len(parts) > 2 else "altres"
+
+
+def _observe_response(r, *args, **kwargs):
+    if metrics.ENABLED:
+        metrics.observe("github_request_seconds", r.elapsed.total_seconds(), method=r.request.method,
+                        endpoint=_endpoint(r.url), status=r.status_code)
+
+
+def http_session() -> "requests.Session":
+    """La sessió del procés: totes les sessions de l'app reutilitzen les connexions."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+# -------------------------
+# Interfície comuna
+# -------------------------
+class ScoreBackend:
+    """Interfície mínima: `load()` -> (ScoreTable, versió) i `append_many(records)` -> versió."""
+
+    def load(self):
+        raise NotImplementedError
+
+    def append_many(self, records: list):
+        raise NotImplementedError
+
+    def append(self, record: dict):
+        return self.append_many([record])
+
+    def leaderboard(self):
+        """Objecte amb `count(total)` i `rows(total, k)` si el backend respon
+        el rànguing directament; si no, `None` i es fa servir `ScoreCache`."""
+        return None
+
+
+# -------------------------
+# Sistema de fitxers local
+# -------------------------
+class LocalShardedStore(ScoreBackend):
+    """Shards en disc més un `manifest.json` compacte amb el recompte per shard.
+
+    L'escriptura és un `open(..., "a")` del shard i una reescriptura atòmica
+    del manifest (uns pocs bytes), protegides amb un lock de fitxer.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._last = None  # (versió, scores) de l'última lectura
+        os.makedirs(root, exist_ok=True)
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST)
+
+    def read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": 0, "shards": {}}
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self._manifest_path())
+
+    def load(self):
+        manifest = self.read_manifest()
+        version = str(manifest["version"])
+        if self._last and self._last[0] == version:
+            return self._last[1], version
+        scores = ScoreTable()
+        for rel in sorted(manifest["shards"]):
+            try:
+                with open(os.path.join(self.root, rel), "rb") as f:
+                    scores.extend_jsonl(f)
+            except FileNotFoundError:
+                continue
+        self._last = (version, scores)
+        return scores, version
+
+    def append_many(self, records: list):
+        with self._lock, open(os.path.join(self.root, ".lock"), "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self.read_manifest()
+            for rel, group in group_by_shard(records).items():
+                path = os.path.join(self.root, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(dump_record(r) for r in group))
+                manifest["shards"][rel] = manifest["shards"].get(rel, 0) + len(group)
+            manifest["version"] += 1
+            self._write_manifest(manifest)
+        return str(manifest["version"])
+
+
+# -------------------------
+# GitHub (API de continguts)
+# -------------------------
+class GitHubShardedStore(ScoreBackend):
+    """Shards dins d'un directori del repositori de GitHub.
+
+    - `load()` llista l'arbre una sola vegada (`git/trees?recursive=1`) i només
+      descarrega els blobs que no té ja en memòria: un shard tancat no canvia
+      mai de sha, així que la seua lectura es fa una sola vegada per procés.
+    - L'arbre es demana amb `If-None-Match`: un 304 no baixa res ni compta
+      per al límit de peticions de l'API.
+    - `append()` fa un commit que només afig un fitxer amb els registres nous;
+      cada `compact_every` commits, un fil fusiona els fitxers dels dies tancats.
+    - El fitxer antic (`scores.jsonl`) es continua llegint, però ja no s'hi escriu.
+    """
+
+    def __init__(self, repo: str, token: str = "", branch: str = "main",
+                 root: str = "scores", legacy_path: str = "scores.jsonl",
+                 api: str = "https://api.github.com", session=None, compact_every: int = 50):
+        self.api = api.rstrip("/")
+        self.session = session or http_session()
+        self.repo = repo
+        self.token = token
+        self.branch = branch
+        self.root = root.strip("/")
+        self.legacy_path = legacy_path
+        self._blobs = {}  # sha -> ScoreTable
+        self._etag = None
+        self._last = (ScoreTable(), None)
+        self.stats = {"not_modified": 0, "modified": 0, "blob_downloads": 0, "bad_lines": 0}
+        self.compact_every = compact_every
+        self.commits = 0
+        self._appends = 0
+        self._head_cache = None  # (commit, arbre) de l'últim commit propi
+        self._compacting = threading.Lock()
+        self._base_headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+    def _headers(self):
+        return dict(self._base_headers)
+
+    def _url(self, path: str) -> str:
+        return f"{self.api}/repos/{self.repo}/{path}"
+
+    def _is_shard(self, path: str) -> bool:
+        return path == self.legacy_path or (
+            path.startswith(self.root + "/") and path.endswith(".jsonl"))
+
+    def _read_blob(self, sha: str) -> ScoreTable:
+        if sha not in self._blobs:
+            # Contingut cru i en streaming; si el servidor torna JSON, base64 a trossos.
+            headers = self._headers()
+            headers["Accept"] = "application/vnd.github.raw+json"
+            with self.session.get(self._url(f"git/blobs/{sha}"), headers=headers,
+                                  timeout=10, stream=True) as r:
+                r.raise_for_status()
+                self.stats["blob_downloads"] += 1
+                if r.headers.get("Content-Type", "").startswith("application/json"):
+                    chunks = b64_chunks(r.json().get("content", ""))
+                else:
+                    chunks = r.iter_content(CHUNK)
+                table = ScoreTable().extend_jsonl(iter_lines(chunks))
+            self.stats["bad_lines"] += table.rejected
+            self._blobs[sha] = table
+        return self._blobs[sha]
+
+    def load(self):
+        headers = self._headers()
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        r = self.session.get(self._url(f"git/trees/{self.branch}"), params={"recursive": "1"},
+                             headers=headers, timeout=10)
+        if r.status_code == 304:
+            self.stats["not_modified"] += 1
+            return self._last
+        if r.status_code == 404:
+            return ScoreTable(), None
+        r.raise_for_status()
+        self.stats["modified"] += 1
+        self._etag = r.headers.get("ETag")
+        data = r.json()
+        shards = sorted((e["path"], e["sha"]) for e in data.get("tree", [])
+                        if e.get("type") == "blob" and self._is_shard(e["path"]))
+        scores = ScoreTable.concat(self._read_blob(sha) for _, sha in shards)
+        self._last = (scores, data.get("sha"))
+        return self._last
+
+    # --- Escriptura amb l'API de dades de Git -------------------------
+    #
+    # Cada enviament és un commit que només afig un fitxer xicotet
+    # (`<total>/<dia>.<segell>.jsonl`) amb els registres nous, en text pla dins
+    # de `POST git/trees`: ni es torna a pujar el shard sencer ni hi ha base64.
+    # El ref s'avança sense `force`; si algú altre ha fet commit entretant,
+    # GitHub respon 422 i es torna a provar sobre el cap nou.
+
+    def _head(self, refresh: bool = False):
+        """(sha del commit, sha de l'arbre) del cap de la branca."""
+        if self._head_cache is None or refresh:
+            r = self.session.get(self._url(f"git/ref/heads/{self.branch}"), headers=self._headers(), timeout=10)
+            r.raise_for_status()
+            commit = r.json()["object"]["sha"]
+            r = self.session.get(self._url(f"git/commits/{commit}"), headers=self._headers(), timeout=10)
+            r.raise_for_status()
+            self._head_cache = (commit, r.json()["tree"]["sha"])
+        return self._head_cache
+
+    def _post(self, path: str, payload: dict) -> dict:
+        r = self.session.post(self._url(path), headers=self._headers(), json=payload, timeout=15)
+        r.raise_for_status()
+        return r.json()
+
+    def _commit(self, entries, message: str = "", fresh: bool = False):
+        """Un commit amb `entries` (format de `git/trees`) sobre el cap. Torna el sha de l'arbre.
+
+        Si el ref ha canviat es torna a provar una vegada sobre el cap nou. Les
+        entrades d'un `append` hi valen igual (cada tros és un fitxer nou), però
+        les que depenen del contingut de l'arbre no: per a eixes, `entries` és
+        una funció `entries(base_tree) -> (entrades, missatge)` que es torna a
+        cridar a cada intent. Si no torna cap entrada, no es fa commit (None).
+        """
+        for attempt in range(2):
+            parent, base_tree = self._head(refresh=fresh or attempt > 0)
+            batch, msg = entries(base_tree) if callable(entries) else (entries, message)
+            if not batch:
+                return None
+            tree = self._post("git/trees", {"base_tree": base_tree, "tree": batch})["sha"]
+            commit = self._post("git/commits", {"message": msg, "tree": tree, "parents": [parent]})["sha"]
+            r = self.session.patch(self._url(f"git/refs/heads/{self.branch}"), headers=self._headers(),
+                                   json={"sha": commit, "force": False}, timeout=15)
+            if r.status_code not in (409, 422):
+                r.raise_for_status()
+                self._head_cache = (commit, tree)
+                self.commits += 1
+                return tree
+        self._head_cache = None
+        raise ConflictError(f"{self.branch}: el ref ha canviat")
+
+    def _piece_path(self, rel: str) -> str:
+        stem = rel[:-len(".jsonl")]
+        return f"{self.root}/{stem}.{time.time_ns():x}{random.getrandbits(16):04x}.jsonl"
+
+    def append_many(self, records: list):
+        """Un sol commit per a tot el lot, amb un fitxer nou per shard tocat."""
+        entries, tables = [], []
+        for rel, group in group_by_shard(records).items():
+            content = "".join(dump_record(rec) for rec in group)
+            entries.append({"path": self._piece_path(rel), "mode": "100644", "type": "blob", "content": content})
+            tables.append((content, group))
+        if len(records) == 1:
+            rec = records[0]
+            message = f"Add score: {rec.get('nom','')} {rec.get('puntuacio','?')}/{rec.get('total','?')}"
+        else:
+            message = f"Add {len(records)} scores"
+        try:
+            version = self._commit(entries, message)
+        except ConflictError as e:
+            raise ConflictError(str(e), list(records)) from None
+        # Ja sabem el contingut dels blobs nous: el pròxim `load()` no els ha de baixar.
+        for content, group in tables:
+            self._blobs[git_blob_sha(content.encode("utf-8"))] = ScoreTable.from_records(group)
+        self._appends += 1
+        if self.compact_every and self._appends % self.compact_every == 0:
+            self.compact_async()
+        return version
+
+    # --- Compactació ---------------------------------------------------
+
+    def _pieces(self, tree: list, today: str) -> dict:
+        """{`<total>/<dia>.jsonl`: [(ruta, sha)]} dels fitxers xicotets de dies tancats."""
+        groups = {}
+        prefix = self.root + "/"
+        for e in tree:
+            path = e.get("path", "")
+            if e.get("type") != "blob" or not path.startswith(prefix):
+                continue
+            m = PIECE.match(path[len(prefix):])
+            if m and m.group(2) < today:
+                groups.setdefault(f"{m.group(1)}/{m.group(2)}.jsonl", []).append((path, e["sha"]))
+        return groups
+
+    def compact(self, today=None, min_pieces: int = 2) -> int:
+        """Fusiona els fitxers xicotets dels dies ja tancats en `<total>/<dia>.jsonl`.
+
+        Un sol commit (afig/reescriu el shard del dia i esborra els trossos).
+        Torna quants fitxers s'han fusionat; 0 si no calia.
+        """
+        today = today or time.strftime("%Y-%m-%d")
+        merged = 0
+
+        def plan(base_tree):
+            # Es calcula sobre l'arbre del cap de cada intent: si entre mig ha
+            # arribat un tros d'un dia tancat (la bústia pot entregar registres
+            # endarrerits) o una altra rèplica ja ha compactat, es té en compte.
+            nonlocal merged
+            r = self.session.get(self._url(f"git/trees/{base_tree}"), params={"recursive": "1"},
+                                 headers=self._headers(), timeout=10)
+            r.raise_for_status()
+            tree = r.json().get("tree", [])
+            shas = {e["path"]: e["sha"] for e in tree if e.get("type") == "blob"}
+            entries, merged = [], 0
+            for rel, pieces in sorted(self._pieces(tree, today).items()):
+                day_path = f"{self.root}/{rel}"
+                if len(pieces) + (day_path in shas) < min_pieces:
+                    continue
+                parts = [self._read_blob(shas[day_path])] if day_path in shas else []
+                parts += [self._read_blob(sha) for _, sha in sorted(pieces)]
+                merged_table = ScoreTable.concat(parts)
+                content = "".join(dump_record(rec) for rec in merged_table.records())
+                self._blobs[git_blob_sha(content.encode("utf-8"))] = merged_table
+                entries.append({"path": day_path, "mode": "100644", "type": "blob", "content": content})
+                entries += [{"path": path, "mode": "100644", "type": "blob", "sha": None} for path, _ in pieces]
+                merged += len(pieces)
+            return entries, f"Compact {merged} score files"
+
+        if self._commit(plan, fresh=True) is None:
+            return 0
+        return merged
+
+    def compact_async(self):
+        """`compact()` en un fil a banda; si ja n'hi ha una en marxa, no fa res."""
+        if not self._compacting.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.compact()
+            except Exception:
+                pass  # es tornarà a provar a la pròxima ronda
+            finally:
+                self._compacting.release()
+
+        threading.Thread(target=run, name="scores-compact", daemon=True).start()
+
+
+# -------------------------
+# SQLite local
+# -------------------------
+class SQLiteStore(ScoreBackend):
+    """Puntuacions en SQLite (WAL) amb un índex que ja dona l'ordre del rànguing.
+
+    `rows(total, k)` és una sola consulta que recorre l'índex
+    (total, pct DESC, minuts DESC, id) i s'atura a les `k` primeres files.
+    Els recomptes per mida viuen en `score_counts`, que mantenen uns
+    triggers (també per a altres processos i per a `import-sqlite`), i la
+    versió és `max(id)`: cap consulta del rànguing recorre la taula.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id        INTEGER PRIMARY KEY,
+            nom       TEXT NOT NULL,
+            puntuacio INTEGER NOT NULL,
+            total     INTEGER NOT NULL,
+            pct       REAL NOT NULL,
+            data      TEXT NOT NULL,
+            minutes   INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scores_rank ON scores (total, pct DESC, minutes DESC, id);
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS score_counts (
+            total INTEGER PRIMARY KEY,
+            n     INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS scores_count_ins AFTER INSERT ON scores BEGIN
+            INSERT INTO score_counts (total, n) VALUES (NEW.total, 1)
+                ON CONFLICT(total) DO UPDATE SET n = n + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS scores_count_del AFTER DELETE ON scores BEGIN
+            UPDATE score_counts SET n = n - 1 WHERE total = OLD.total;
+        END;
+        -- Bases d'abans dels recomptes: una sola passada per a omplir-los.
+        INSERT INTO score_counts (total, n)
+            SELECT total, count(*) FROM scores
+            WHERE NOT EXISTS (SELECT 1 FROM score_counts) GROUP BY total;
+        COMMIT;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._db().executescript(self.SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @staticmethod
+    def _row(r: dict) -> tuple:
+        num = int(r.get("puntuacio") or 0)
+        total = int(r.get("total") or 0)
+        data = r.get("data") or ""
+        return (r.get("nom", "—"), num, total, num / max(1, total), data, date_minutes(data))
+
+    def _version(self, db) -> str:
+        # Append-only: l'últim id ja canvia a cada escriptura (i és O(log n)).
+        return str(db.execute("SELECT max(id) FROM scores").fetchone()[0] or 0)
+
+    def load(self):
+        db = self._db()
+        table = ScoreTable()
+        for nom, num, total, data in db.execute(
+                "SELECT nom, puntuacio, total, data FROM scores ORDER BY id"):
+            table.append(nom, num, total, data)
+        return table, self._version(db)
+
+    def append_many(self, records: list):
+        db = self._db()
+        with db:
+            db.executemany("INSERT INTO scores (nom, puntuacio, total, pct, data, minutes) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", (self._row(r) for r in records))
+        return self._version(db)
+
+    def leaderboard(self):
+        return self
+
+    def count(self, total: int) -> int:
+        row = self._db().execute("SELECT n FROM score_counts WHERE total = ?", (total,)).fetchone()
+        return row[0] if row else 0
+
+    def rows(self, total: int, k=None) -> list:
+        cur = self._db().execute(
+            "SELECT nom, puntuacio, total, data FROM scores WHERE total = ? "
+            "ORDER BY pct DESC, minutes DESC, id LIMIT ?", (total, -1 if k is None else k))
+        return [to_row(*r) for r in cur]
+
+    def import_jsonl(self, path: str, batch: int = 10000, stats=None) -> int:
+        """Importació d'una sola vegada d'un JSONL (p. ex. el `scores.jsonl` antic).
+
+        Les línies invàlides se salten i es compten a `stats["bad_lines"]`.
+        """
+        n = 0
+        pending = []
+        with open(path, "rb") as f:
+            for nom, punts, total, data in parse_records(f, stats):
+                pending.append({"nom": nom, "puntuacio": punts, "total": total, "data": data})
+                if len(pending) >= batch:
+                    self.append_many(pending)
+                    n += len(pending)
+                    pending = []
+        if pending:
+            self.append_many(pending)
+            n += len(pending)
+        return n
+
+
+# -------------------------
+# Memòria cau del rànguing
+# -------------------------
+class ScoreCache:
+    """Còpia en memòria del rànguing, amb nom i versió (el sha del backend).
+
+    Substitueix `st.cache_data.clear()`: refrescar o guardar només toca
+    aquesta cache. Després d'un `append` s'hi afegeixen els registres nous
+    amb la versió que torna el backend, sense tornar a baixar res; la
+    recàrrega periòdica (`ttl`) reconcilia el que hagen escrit altres processos.
+
+    Si es passa `index` (p. ex. `leaderboard.Leaderboard`), se'n construeix
+    un per versió i s'actualitza amb `index.add(fila)` a cada `append`.
+    """
+
+    def __init__(self, backend: ScoreBackend, name: str = "scores", ttl: float = 60, index=None):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.index_factory = index
+        self.index = None
+        self.scores = ScoreTable()
+        self.version = None
+        self._loaded_at = None
+        self._own = False  # `scores` és una còpia nostra i no la taula del backend
+        self._indexed = None  # la taula de la qual són els números de fila de l'índex
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "index_builds": 0}
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _refresh(self):
+        scores, version = self.backend.load()
+        self.scores, self.version = scores, version
+        self._own = False
+        # L'índex guarda números de fila de la taula amb què es va construir. Un
+        # 304 torna el mateix objecte i el reaprofita; una taula nova (encara que
+        # tinga la mateixa versió i mida, p. ex. rellegida després d'un guardat
+        # propi) pot tindre les files en un altre ordre: es reconstrueix.
+        if self.index_factory and (self.index is None or scores is not self._indexed):
+            self.index = self.index_factory(scores)
+            self._indexed = scores
+            self.stats["index_builds"] += 1
+        self._loaded_at = time.monotonic()
+
+    def _fresh(self):
+        """Recarrega si ha passat el `ttl` i compta l'encert o la fallada (amb el lock pres)."""
+        if self._stale():
+            self.stats["misses"] += 1
+            metrics.inc("cache_total", cache=self.name, result="miss")
+            with metrics.span("cache_refresh", cache=self.name):
+                self._refresh()
+        else:
+            self.stats["hits"] += 1
+            metrics.inc("cache_total", cache=self.name, result="hit")
+
+    def get(self):
+        """Torna (scores, versió), recarregant si ha passat el `ttl`."""
+        with self._lock:
+            self._fresh()
+            return self.scores, self.version
+
+    def get_index(self):
+        """Com `get()`, però torna l'índex."""
+        with self._lock:
+            self._fresh()
+            return self.index
+
+    def apply_append(self, records: list, version):
+        """Afig uns registres ja escrits al backend, sense tornar a llegir-lo.
+
+        Si la caché ja té `version` (un altre rerun l'ha recarregada després
+        del commit), els registres ja hi són. La taula del backend no es toca
+        mai: la primera vegada es copia (l'índex només guarda números de fila,
+        que la còpia conserva).
+        """
+        with self._lock:
+            if self._loaded_at is None or version == self.version:
+                return
+            if not self._own:
+                self.scores = self.scores.copy()
+                if self.index is not None:
+                    self.index.table = self._indexed = self.scores
+                self._own = True
+            for r in records:
+                row = self.scores.append_record(r)
+                if self.index is not None:
+                    self.index.add(row)
+            self.version = version
+
+    def invalidate(self):
+        """La pròxima lectura recarrega; la resta de caches no es toquen."""
+        with self._lock:
+            self._loaded_at = None
+
+
+# -------------------------
+# Cua d'escriptura (agrupa i reintenta)
+# -------------------------
+class _Ticket:
+    __slots__ = ("record", "done", "version", "error")
+
+    def __init__(self, record: dict):
+        self.record = record
+        self.done = threading.Event()
+        self.version = None
+        self.error = None
+
+
+class WriteQueue:
+    """Agrupa les puntuacions que arriben dins d'una finestra curta en un sol commit.
+
+    El primer fil que troba la cua parada fa de líder: espera `window` segons,
+    s'emporta tot el que s'ha acumulat i ho escriu d'una vegada. Els altres
+    fils només esperen el resultat. Els conflictes es reintenten amb backoff
+    exponencial amb jitter i un màxim de `max_attempts` intents.
+    """
+
+    def __init__(self, backend: ScoreBackend, window: float = 0.25, max_attempts: int = 5,
+                 base_delay: float = 0.2, max_delay: float = 3.0):
+        self.backend = backend
+        self.window = window
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._flushing = False
+        self.metrics = {"submitted": 0, "batches": 0, "attempts": 0, "conflicts": 0,
+                        "failures": 0, "queue_depth": 0, "max_queue_depth": 0}
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _write(self, records: list):
+        attempt = 0
+        while True:
+            attempt += 1
+            self.metrics["attempts"] += 1
+            try:
+                return self.backend.append_many(records)
+            except ConflictError as e:
+                self.metrics["conflicts"] += 1
+                records = e.pending or records
+                if attempt >= self.max_attempts:
+                    raise
+                time.sleep(self._backoff(attempt))
+
+    def _flush(self):
+        # Un sol líder escriu alhora dins del procés; el que arriba mentre
+        # s'escriu va al lot següent, que el mateix líder buida després.
+        while True:
+            time.sleep(self.window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self.metrics["queue_depth"] = 0
+                if not batch:
+                    self._flushing = False
+                    return
+            self.metrics["batches"] += 1
+            try:
+                version = self._write([t.record for t in batch])
+            except Exception as e:
+                self.metrics["failures"] += 1
+                for t in batch:
+                    t.error = e
+                    t.done.set()
+                continue
+            for t in batch:
+                t.version = version
+                t.done.set()
+
+    def submit(self, record: dict, timeout: float = 60):
+        """Encua el registre i bloqueja fins que està escrit. Torna la nova versió."""
+        return self.submit_many([record], timeout)
+
+    def submit_many(self, records: list, timeout: float = 60):
+        """Com `submit`, per a diversos registres que han d'anar junts."""
+        tickets = [_Ticket(r) for r in records]
+        with self._lock:
+            self._pending.extend(tickets)
+            self.metrics["submitted"] += len(tickets)
+            depth = len(self._pending)
+            self.metrics["queue_depth"] = depth
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], depth)
+            leader = not self._flushing
+            self._flushing = True
+        if leader:
+            self._flush()
+        version = None
+        for ticket in tickets:
+            if not ticket.done.wait(timeout):
+                raise TimeoutError("La cua d'escriptura no ha respost a temps.")
+            if ticket.error:
+                raise ticket.error
+            version = ticket.version
+        return version
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Eines del rànguing.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import-sqlite", help="importa fitxers JSONL a una base SQLite")
+    imp.add_argument("paths", nargs="+")
+    imp.add_argument("--db", default="scores.sqlite")
+    args = ap.parse_args(argv)
+    store = SQLiteStore(args.db)
+    for path in args.paths:
+        stats = {}
+        n = store.import_jsonl(path, stats=stats)
+        print(f"{path}: {n} registres, {stats.get('bad_lines', 0)} línies descartades", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# =========================
+# search.py — Índex de cerca
+# =========================
+"""Cerca insensible a accents i amb tolerància a errades.
+
+- `normalize`: NFC, minúscules i espais fora.
+- `fold`: a més, lleva els diacrítics i passa `l·l` (i variants del punt
+  volat) a `ll`. Així "deu", "déu" i "dèu" cauen a la mateixa clau.
+- Suggeriments per distància d'edició amb un índex d'esborrats (estil
+  SymSpell): cada clau plegada es registra amb totes les variants que
+  resulten d'esborrar-li fins a `max_dist` lletres. Una consulta genera les
+  seues pròpies variants, n'agafa els candidats del dict i només calcula
+  Levenshtein sobre eixos pocs. Amb monosíl·labs (paraules curtes) l'índex
+  és xicotet i la consulta no depén de la mida del corpus.
+"""
+import unicodedata
+
+_MIDDLE_DOTS = ("l·l", "l.l", "l•l", "l‧l", "ŀl", "l∙l")
+
+
+def normalize(s: str) -> str:
+    return unicodedata.normalize("NFC", (s or "").strip().lower())
+
+
+def fold(s: str) -> str:
+    s = normalize(s)
+    for dot in _MIDDLE_DOTS:
+        s = s.replace(dot, "ll")
+    s = unicodedata.normalize("NFD", s)
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def deletes(word: str, max_dist: int) -> set:
+    """Totes les variants de `word` amb fins a `max_dist` lletres esborrades."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_dist):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+class SearchIndex:
+    def __init__(self, words, max_dist: int = 2):
+        self.words = list(words)
+        self.max_dist = max_dist
+        self.exact = {normalize(w): w for w in self.words}
+        self.folded = {}
+        for w in self.words:
+            self.folded.setdefault(fold(w), []).append(w)
+        self.variants = {}  # variant esborrada -> claus plegades
+        for key in self.folded:
+            for v in deletes(key, max_dist):
+                self.variants.setdefault(v, []).append(key)
+
+    def lookup(self, query: str) -> list:
+        """Paraules que coincideixen llevat d'accents; la coincidència exacta primer."""
+        q = normalize(query)
+        matches = list(self.folded.get(fold(q), ()))
+        if q in self.exact:
+            w = self.exact[q]
+            matches.remove(w)
+            matches.insert(0, w)
+        return matches
+
+    def suggest(self, query: str, max_dist=None, limit: int = 8) -> list:
+        """Paraules a distància d'edició <= `max_dist` (sense accents), les més properes primer."""
+        max_dist = self.max_dist if max_dist is None else min(max_dist, self.max_dist)
+        q = fold(query)
+        keys = {k for v in deletes(q, max_dist) for k in self.variants.get(v, ())}
+        scored = sorted((levenshtein(q, k), k) for k in keys)
+        out = []
+        for d, key in scored:
+            if d > max_dist:
+                break
+            out.extend(self.folded[key])
+        return out[:limit]
@@ -0,0 +1,108 @@
+# =========================
+# shared_cache.py — Caché compartida entre rèpliques
+# =========================
+"""Capa opcional perquè diverses rèpliques de l'app compartisquen el rànguing.
+
+Totes les rèpliques de la mateixa màquina (o amb un disc compartit) apunten
+al mateix fitxer SQLite, que guarda la `ScoreTable` ja parsejada i un
+comptador de versió:
+
+- Mentre la foto siga fresca (`ttl`), cap rèplica toca GitHub: només
+  comparen el comptador i, si ha canviat, deserialitzen la taula.
+- Quan caduca, una sola rèplica aconsegueix el "permís" de refrescar
+  (UPDATE condicional); les altres continuen servint la foto anterior.
+- Guardar una puntuació marca la foto com a caducada.
+
+Així les peticions a GitHub no creixen amb el nombre de rèpliques.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import metrics
+from score_table import ScoreTable
+from scores_store import ScoreBackend
+
+LEASE_SECONDS = 30
+
+
+class SharedCacheBackend(ScoreBackend):
+    def __init__(self, backend: ScoreBackend, path: str, ttl: float = 15, name: str = "scores"):
+        self.backend = backend
+        self.path = path
+        self.ttl = ttl
+        self.name = name
+        self._seen = None  # (comptador, ScoreTable, versió origen)
+        self.stats = {"shared_hits": 0, "refreshes": 0, "stale_served": 0}
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS snapshot (
+                name TEXT PRIMARY KEY,
+                counter INTEGER NOT NULL,
+                source_version TEXT,
+                fetched_at REAL NOT NULL,
+                lease_until REAL NOT NULL,
+                data BLOB)""")
+            db.execute("INSERT OR IGNORE INTO snapshot VALUES (?, 0, NULL, 0, 0, NULL)", (name,))
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _row(self, db):
+        return db.execute("SELECT counter, source_version, fetched_at, data FROM snapshot WHERE name = ?",
+                          (self.name,)).fetchone()
+
+    def _from_row(self, counter, source_version, data):
+        if self._seen and self._seen[0] == counter:
+            return self._seen[1], self._seen[2]
+        table = ScoreTable.from_bytes(data)
+        self._seen = (counter, table, source_version)
+        return table, source_version
+
+    def _claim(self, db, now) -> bool:
+        cur = db.execute("UPDATE snapshot SET lease_until = ? WHERE name = ? AND lease_until < ?",
+                         (now + LEASE_SECONDS, self.name, now))
+        return cur.rowcount == 1
+
+    def load(self):
+        now = time.time()
+        with self._connect() as db:
+            counter, source_version, fetched_at, data = self._row(db)
+            if data is not None and now - fetched_at < self.ttl:
+                self.stats["shared_hits"] += 1
+                metrics.inc("cache_total", cache="shared", result="hit")
+                return self._from_row(counter, source_version, data)
+            claimed = self._claim(db, now)
+        if not claimed and data is not None:
+            self.stats["stale_served"] += 1
+            metrics.inc("cache_total", cache="shared", result="stale")
+            return self._from_row(counter, source_version, data)
+
+        # Ens toca refrescar (o encara no hi ha res compartit).
+        try:
+            table, version = self.backend.load()
+        except Exception:
+            with self._connect() as db:
+                db.execute("UPDATE snapshot SET lease_until = 0 WHERE name = ?", (self.name,))
+            raise
+        self.stats["refreshes"] += 1
+        metrics.inc("cache_total", cache="shared", result="refresh")
+        with self._connect() as db:
+            counter = self._row(db)[0] + 1
+            db.execute("""UPDATE snapshot SET counter = ?, source_version = ?, fetched_at = ?,
+                          lease_until = 0, data = ? WHERE name = ?""",
+                       (counter, version, time.time(), table.to_bytes(), self.name))
+        self._seen = (counter, table, version)
+        return table, version
+
+    def append_many(self, records: list):
+        version = self.backend.append_many(records)
+        with self._connect() as db:
+            db.execute("UPDATE snapshot SET fetched_at = 0 WHERE name = ?", (self.name,))
+        return version